@@ -8,6 +8,9 @@ These costs are subtracted from company profit calculations.
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
+# Company statistics merge these costs in and are cached; drop them on every write
+from services import invalidate_statistics_cache
+
 # Check if using PostgreSQL
 try:
     from database import USE_POSTGRES
@@ -135,6 +138,7 @@ class AdditionalCostsService:
                 cost_id = cursor.fetchone()[0]
 
             self.db.commit()
+            invalidate_statistics_cache()
 
             return {
                 "id": cost_id,
@@ -181,6 +185,7 @@ class AdditionalCostsService:
             tuple(values),
         )
         self.db.commit()
+        invalidate_statistics_cache()
 
         if cursor.rowcount == 0:
             return {"error": "Cost not found"}
@@ -201,6 +206,7 @@ class AdditionalCostsService:
             (cost_id,),
         )
         self.db.commit()
+        invalidate_statistics_cache()
 
         return {"status": "deleted", "deleted": cost}
 
@@ -459,6 +465,7 @@ class AdditionalCostsService:
                 skipped += 1
 
         self.db.commit()
+        invalidate_statistics_cache()
 
         return {
             "source_period": source_period,
@@ -5,7 +5,6 @@ Automated backups and restoration for 粗利 PRO
 
 import hashlib
 import json
-import shutil
 import sqlite3
 from datetime import datetime
 from pathlib import Path
@@ -37,6 +36,26 @@ def calculate_checksum(file_path: Path) -> str:
     return hash_md5.hexdigest()
 
 
+def copy_sqlite_database(src_path: Path, dst_path: Path, standalone: bool = True):
+    """
+    Copy a SQLite database with the online backup API.
+
+    A plain file copy misses commits still in the -wal file (the live DB runs
+    in WAL mode); the backup API reads and writes through it. With standalone,
+    the copy is switched back to a rollback journal so it stays a single
+    self-contained file (not used when restoring over the live DB).
+    """
+    src = sqlite3.connect(str(src_path))
+    dst = sqlite3.connect(str(dst_path))
+    try:
+        src.backup(dst)
+        if standalone:
+            dst.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        dst.close()
+        src.close()
+
+
 def validate_backup_filename(filename: str, backup_dir: Path) -> Optional[Path]:
     """
     Validate backup filename to prevent path traversal attacks.
@@ -97,7 +116,7 @@ class BackupService:
 
         try:
             # Copy database file
-            shutil.copy2(self.db_path, backup_path)
+            copy_sqlite_database(self.db_path, backup_path)
 
             # Calculate checksum
             checksum = calculate_checksum(backup_path)
@@ -178,10 +197,10 @@ class BackupService:
             # Create backup of current database before restore
             if self.db_path.exists():
                 pre_restore_backup = self.db_path.with_suffix(".pre_restore.db")
-                shutil.copy2(self.db_path, pre_restore_backup)
+                copy_sqlite_database(self.db_path, pre_restore_backup)
 
-            # Restore
-            shutil.copy2(backup_path, self.db_path)
+            # Restore (through SQLite so an existing -wal file is not left stale)
+            copy_sqlite_database(backup_path, self.db_path, standalone=False)
 
             return {
                 "success": True,
@@ -6,8 +6,10 @@ Detection is automatic based on DATABASE_URL environment variable.
 """
 
 import os
+import queue
 import sqlite3
 from pathlib import Path
+from typing import Dict, Iterator
 from urllib.parse import urlparse
 
 # Detect database type from environment
@@ -29,6 +31,25 @@ else:
 # Database file path (SQLite only)
 DB_PATH = Path(__file__).parent / "arari_pro.db"
 
+# Prepared statements kept per SQLite connection (sqlite3 default: 128). The
+# services build per-filter SQL variants; pooled connections keep them all
+# compiled instead of evicting and re-preparing the hot ones
+SQLITE_CACHED_STATEMENTS = 256
+
+# Per-connection SQLite tuning (WAL is set separately - it persists in the file)
+# - synchronous=NORMAL: safe with WAL, fsyncs only at checkpoints
+# - temp_store=MEMORY: sort/group-by temp b-trees stay in RAM
+# - mmap_size=256MB, cache_size=64MB: statistics scans read pages without syscalls
+# - busy_timeout=30s: pooled connections wait out a long upload's write lock
+#   instead of failing with "database is locked"
+SQLITE_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA busy_timeout = 30000",
+)
+
 
 def get_connection(db_path=None):
     """Create a new database connection (SQLite or PostgreSQL)"""
@@ -38,20 +59,124 @@ def get_connection(db_path=None):
         return conn
     else:
         path = db_path if db_path else str(DB_PATH)
-        conn = sqlite3.connect(path, check_same_thread=False)
+        conn = sqlite3.connect(
+            path, check_same_thread=False, cached_statements=SQLITE_CACHED_STATEMENTS
+        )
         conn.row_factory = sqlite3.Row
         # Enable foreign key constraints (disabled by default in SQLite)
         conn.execute("PRAGMA foreign_keys = ON")
+        # Pin ASCII case-insensitive LIKE for search fallbacks
+        conn.execute("PRAGMA case_sensitive_like = OFF")
+        # WAL lets readers run alongside the writer and halves fsyncs per commit
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+        except sqlite3.DatabaseError:
+            pass  # e.g. read-only media - keep the default rollback journal
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
         return conn
 
 
+# Idle SQLite connections kept for reuse by get_db. More can be open at once
+# under load; extras are closed on release instead of being pooled.
+SQLITE_POOL_SIZE = 8
+
+
+class ConnectionPool:
+    """
+    LIFO pool of SQLite connections.
+
+    Reusing connections skips connect + PRAGMA setup on every request and keeps
+    each connection's page cache and prepared statements warm. With WAL, pooled
+    connections read concurrently; writers still serialize on SQLite's lock.
+    """
+
+    def __init__(self, db_path=None, max_size: int = SQLITE_POOL_SIZE, read_only: bool = False):
+        self.db_path = db_path
+        self.read_only = read_only
+        self._idle = queue.LifoQueue(maxsize=max_size)
+
+    def acquire(self) -> sqlite3.Connection:
+        """Take an idle connection, or open a new one if none is available"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            conn = get_connection(self.db_path)
+            if self.read_only:
+                # Reject writes on this connection; it never takes the write lock
+                conn.execute("PRAGMA query_only = ON")
+            return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection, discarding any uncommitted work"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = sqlite3.Row
+            self._idle.put_nowait(conn)
+        except (queue.Full, sqlite3.Error):
+            # Pool is full or the connection is unusable (e.g. closed)
+            conn.close()
+
+    def close_all(self) -> None:
+        """Close every idle connection"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            if not self.read_only:
+                # Let SQLite re-analyze tables whose statistics went stale
+                try:
+                    conn.execute("PRAGMA optimize")
+                except sqlite3.Error:
+                    pass
+            conn.close()
+
+
+_sqlite_pool = ConnectionPool()
+# Read-only connections for GET endpoints, so dashboard reads never queue
+# behind (or accidentally take) the write lock held by an upload
+_sqlite_read_pool = ConnectionPool(read_only=True)
+
+
+def close_db_pool():
+    """Close pooled SQLite connections (application shutdown)"""
+    _sqlite_pool.close_all()
+    _sqlite_read_pool.close_all()
+
+
 def get_db():
     """Dependency for FastAPI to get database connection"""
-    conn = get_connection()
-    try:
-        yield conn
-    finally:
-        conn.close()
+    if USE_POSTGRES:
+        conn = get_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+    else:
+        conn = _sqlite_pool.acquire()
+        try:
+            yield conn
+        finally:
+            _sqlite_pool.release(conn)
+
+
+def get_read_db():
+    """
+    Dependency for read-only endpoints.
+
+    SQLite connections come from the query_only pool; PostgreSQL uses a
+    per-request connection exactly like get_db.
+    """
+    if USE_POSTGRES:
+        yield from get_db()
+    else:
+        conn = _sqlite_read_pool.acquire()
+        try:
+            yield conn
+        finally:
+            _sqlite_read_pool.release(conn)
 
 
 def adapt_query(query: str) -> str:
@@ -75,6 +200,23 @@ def adapt_query(query: str) -> str:
     return adapted
 
 
+def iter_rows_as_dicts(cursor) -> Iterator[Dict]:
+    """
+    Yield the remaining rows of an executed cursor as plain dicts.
+
+    Column names are read from cursor.description once; dict(zip(...)) over
+    the row values is ~3x faster than dict(sqlite3.Row). PostgreSQL rows are
+    already dicts (RealDictCursor) and are only copied.
+    """
+    if USE_POSTGRES:
+        for row in cursor:
+            yield dict(row)
+        return
+    keys = [column[0] for column in cursor.description]
+    for row in cursor:
+        yield dict(zip(keys, row))
+
+
 def _add_column_if_not_exists(cursor, table: str, col_name: str, col_type: str):
     """Add column if it doesn't exist (works with both SQLite and PostgreSQL)"""
     if USE_POSTGRES:
@@ -218,40 +360,56 @@ def init_db(conn=None):
     # Create indexes for performance
     cursor.execute(
         """
-        CREATE INDEX IF NOT EXISTS idx_payroll_period
-        ON payroll_records(period)
+        CREATE INDEX IF NOT EXISTS idx_employees_company
+        ON employees(dispatch_company)
     """
     )
 
+    # Superseded indexes: (period) is a prefix of idx_payroll_period_margin and
+    # (employee_id) / (employee_id, period) duplicate the UNIQUE(employee_id, period)
+    # index. They only slowed down bulk payroll inserts, so drop them.
+    for index_name in ("idx_payroll_period", "idx_payroll_employee", "idx_payroll_emp_period"):
+        cursor.execute(f"DROP INDEX IF EXISTS {index_name}")
+
+    # Composite indexes for frequently used query patterns
     cursor.execute(
         """
-        CREATE INDEX IF NOT EXISTS idx_payroll_employee
-        ON payroll_records(employee_id)
+        CREATE INDEX IF NOT EXISTS idx_payroll_period_margin
+        ON payroll_records(period, profit_margin)
     """
     )
 
+    # Dashboard "recent payrolls" (top 10 by profit in a period): read in index
+    # order and stop after LIMIT rows instead of sorting the whole period
     cursor.execute(
         """
-        CREATE INDEX IF NOT EXISTS idx_employees_company
-        ON employees(dispatch_company)
+        CREATE INDEX IF NOT EXISTS idx_payroll_period_profit
+        ON payroll_records(period, gross_profit DESC)
     """
     )
 
-    # Composite indexes for frequently used query patterns
+    # Covering index for per-period statistics: the dashboard aggregates
+    # (SUM/AVG of profit, revenue, cost, margin) read only the index
     cursor.execute(
         """
-        CREATE INDEX IF NOT EXISTS idx_payroll_emp_period
-        ON payroll_records(employee_id, period DESC)
+        CREATE INDEX IF NOT EXISTS idx_payroll_period_stats
+        ON payroll_records(period, employee_id, gross_profit, billing_amount,
+                           total_company_cost, profit_margin)
     """
     )
 
+    # Lets employee joins that only need the rate (e.g. paid leave cost) skip the table
     cursor.execute(
         """
-        CREATE INDEX IF NOT EXISTS idx_payroll_period_margin
-        ON payroll_records(period, profit_margin)
+        CREATE INDEX IF NOT EXISTS idx_employees_id_rate
+        ON employees(employee_id, hourly_rate)
     """
     )
 
+    # Refresh planner statistics so the indexes above are actually chosen
+    cursor.execute("ANALYZE payroll_records")
+    cursor.execute("ANALYZE employees")
+
     # ================================================================
     # SETTINGS TABLE - For configurable rates like 雇用保険
     # ================================================================
@@ -414,6 +572,14 @@ def init_db(conn=None):
     except Exception as e:
         print(f"[WARN] Cache tables: {e}")
 
+    try:
+        from search import init_search_tables
+
+        init_search_tables(conn)
+        print("[OK] Search tables initialized")
+    except Exception as e:
+        print(f"[WARN] Search tables: {e}")
+
     try:
         from backup import init_backup_system
 
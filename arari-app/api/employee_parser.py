@@ -395,9 +395,9 @@ class DBGenzaiXParser:
         gender_str = str(value).strip().upper()
 
         # Japanese mappings
-        if gender_str in ["男", "男性", "M", "MALE", "♂"]:
+        if gender_str in {"男", "男性", "M", "MALE", "♂"}:
             return "M"
-        elif gender_str in ["女", "女性", "F", "FEMALE", "♀"]:
+        elif gender_str in {"女", "女性", "F", "FEMALE", "♀"}:
             return "F"
 
         return None
@@ -43,7 +43,7 @@ from auth_dependencies import (
 )
 from backup import BackupService
 from budget import BudgetService
-from database import get_db, init_db
+from database import close_db_pool, get_db, init_db
 from employee_parser import DBGenzaiXParser
 from models import Employee, EmployeeCreate, PayrollRecord, PayrollRecordCreate
 from notifications import NotificationService
@@ -51,7 +51,7 @@ from reports import ReportService
 from roi import ROIService
 from salary_parser import SalaryStatementParser
 from search import SearchService
-from services import ExcelParser, PayrollService
+from services import ExcelParser, PayrollService, invalidate_statistics_cache
 from template_manager import TemplateManager, create_template_from_excel
 from validation import ValidationService
 
@@ -251,6 +251,7 @@ async def lifespan(app: FastAPI):
 
     yield
     # Shutdown
+    close_db_pool()
     if frontend_process:
         logging.info(f"Terminating frontend process (PID: {frontend_process.pid})...")
         if sys.platform == "win32":
@@ -343,6 +344,7 @@ async def sync_employees(
     try:
         from migrate_employees import migrate_employees_sync
         success, stats = migrate_employees_sync(db)
+        invalidate_statistics_cache()
 
         if success:
             return {
@@ -360,6 +362,25 @@ async def sync_employees(
 
 # ============== Import Employees Endpoint ==============
 
+def _employee_create(emp) -> EmployeeCreate:
+    """Map a parsed master-file employee (employee_parser.EmployeeRecord) to EmployeeCreate"""
+    return EmployeeCreate(
+        employee_id=emp.employee_id,
+        name=emp.name,
+        name_kana=emp.name_kana,
+        dispatch_company=emp.dispatch_company if emp.dispatch_company else "Unknown",
+        department=emp.department,
+        hourly_rate=emp.hourly_rate,
+        billing_rate=emp.billing_rate,
+        status=emp.status,
+        hire_date=emp.hire_date,
+        employee_type=emp.employee_type,
+        gender=emp.gender,
+        birth_date=emp.birth_date,
+        termination_date=emp.termination_date,
+    )
+
+
 @app.post("/api/import-employees")
 async def import_employees(
     file: UploadFile = File(...),
@@ -392,43 +413,17 @@ async def import_employees(
 
         try:
             parser = DBGenzaiXParser()
-            employees, stats = parser.parse_employees(tmp_path)
+            employees, stats = await run_in_threadpool(parser.parse_employees, tmp_path)
             logging.info(f"/api/import-employees: Parsed {len(employees)} employees. Stats: {stats}")
 
-            service = PayrollService(db)
-            added_count = 0
-            updated_count = 0
-
-            for emp in employees:
-                emp_data = EmployeeCreate(
-                    employee_id=emp.employee_id,
-                    name=emp.name,
-                    name_kana=emp.name_kana,
-                    dispatch_company=emp.dispatch_company if emp.dispatch_company else "Unknown",
-                    department=emp.department,
-                    hourly_rate=emp.hourly_rate,
-                    billing_rate=emp.billing_rate,
-                    status=emp.status,
-                    hire_date=emp.hire_date,
-                    employee_type=emp.employee_type,
-                    gender=emp.gender,
-                    birth_date=emp.birth_date,
-                    termination_date=emp.termination_date,
-                )
-
-                existing = service.get_employee(emp.employee_id)
-                if existing:
-                    service.update_employee(emp.employee_id, emp_data)
-                    updated_count += 1
-                else:
-                    service.create_employee(emp_data)
-                    added_count += 1
+            employee_rows = [_employee_create(emp) for emp in employees]
+            result = PayrollService(db).bulk_upsert_employees(employee_rows)
 
             return {
                 "status": "success",
                 "message": f"Successfully imported {len(employees)} employees",
-                "employees_added": added_count,
-                "employees_updated": updated_count,
+                "employees_added": result["created"],
+                "employees_updated": result["updated"],
                 "employees_skipped": stats['rows_skipped'],
                 "total_employees": len(employees),
                 "errors": parser.errors
@@ -443,6 +438,10 @@ async def import_employees(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Payroll uploads are saved in bulk chunks of this size, with a progress message per chunk
+UPLOAD_SAVE_CHUNK = 500
+
+
 @app.post("/api/upload")
 async def upload_payroll_file(
     file: UploadFile = File(...),
@@ -522,31 +521,30 @@ async def upload_payroll_file(
                 yield json.dumps({"type": "info", "message": f"Parsed {len(records)} records. Saving to database..."}) + "\n"
 
                 service = PayrollService(db)
-                saved_count = 0
-                error_count = 0
 
-                # Batch save or single transaction? Using single transaction for speed/consistency
+                # Single transaction + executemany for speed/consistency
                 cursor = db.cursor()
                 cursor.execute("BEGIN")  # Standard SQL (works in SQLite and PostgreSQL)
                 try:
                     total = len(records)
-                    for i, record_data in enumerate(records):
-                        try:
-                            service.create_payroll_record(record_data)
-                            saved_count += 1
-                        except Exception:
-                            error_count += 1
-
-                        # Report progress every 50 records
-                        if (i+1) % 50 == 0:
-                             yield json.dumps({
-                                 "type": "progress",
-                                 "message": f"Saving records [{i+1}/{total}]...",
-                                 "current": i+1,
-                                 "total": total
-                             }) + "\n"
+                    saved_count = 0
+                    error_count = 0
+                    for start in range(0, total, UPLOAD_SAVE_CHUNK):
+                        result = service.bulk_create_payroll_records(records[start:start + UPLOAD_SAVE_CHUNK])
+                        saved_count += result["saved"]
+                        error_count += result["errors"]
+
+                        done = min(start + UPLOAD_SAVE_CHUNK, total)
+                        yield json.dumps({
+                            "type": "progress",
+                            "message": f"Saving records [{done}/{total}]...",
+                            "current": done,
+                            "total": total
+                        }) + "\n"
 
                     db.commit()
+                    invalidate_statistics_cache()
+                    service.analyze()
                     yield json.dumps({
                         "type": "success",
                         "message": f"Successfully saved {saved_count} records.",
@@ -591,42 +589,12 @@ async def upload_payroll_file(
                         employees, stats = emp_future.result()
                     yield json.dumps({"type": "info", "message": f"Found {len(employees)} employees."}) + "\n"
 
-                    service = PayrollService(db)
-                    imported_count = 0
                     total = len(employees)
+                    employee_rows = [_employee_create(emp) for emp in employees]
+                    yield json.dumps({"type": "progress", "message": f"Syncing {total} employees..."}) + "\n"
 
-                    for i, emp in enumerate(employees):
-                        # Convert/Upsert logic...
-                        emp_data = EmployeeCreate(
-                            employee_id=emp.employee_id,
-                            name=emp.name,
-                            name_kana=emp.name_kana,
-                            dispatch_company=emp.dispatch_company if emp.dispatch_company else "Unknown",
-                            department=emp.department,
-                            hourly_rate=emp.hourly_rate,
-                            billing_rate=emp.billing_rate,
-                            status=emp.status,
-                            hire_date=emp.hire_date,
-                            employee_type=emp.employee_type,
-                            gender=emp.gender,
-                            birth_date=emp.birth_date,
-                            termination_date=emp.termination_date,
-                        )
-                        existing = service.get_employee(emp.employee_id)
-                        if existing:
-                            service.update_employee(emp.employee_id, emp_data)
-                        else:
-                            service.create_employee(emp_data)
-
-                        imported_count += 1
-
-                        if (i+1) % 50 == 0:
-                             yield json.dumps({
-                                 "type": "progress",
-                                 "message": f"Syncing employees [{i+1}/{total}]...",
-                                 "current": i+1,
-                                 "total": total
-                             }) + "\n"
+                    PayrollService(db).bulk_upsert_employees(employee_rows)
+                    imported_count = total
 
                     yield json.dumps({
                         "type": "success",
@@ -644,7 +612,7 @@ async def upload_payroll_file(
                 parser = ExcelParser()
 
                 # Run parser in thread with keepalive messages to prevent timeout
-                gen_future = loop.run_in_executor(executor, parser.parse, content)
+                gen_future = loop.run_in_executor(executor, parser.parse, content, file_ext)
                 elapsed = 0
                 records = None
                 while not gen_future.done():
@@ -664,13 +632,17 @@ async def upload_payroll_file(
                     records = []
 
                 service = PayrollService(db)
+                total = len(records)
                 saved_count = 0
-                # Simple save loop
-                for i, r in enumerate(records):
-                    service.create_payroll_record(r)
-                    saved_count += 1
-                    if (i+1) % 50 == 0:
-                        yield json.dumps({"type": "progress", "message": f"Saving {i+1}..."}) + "\n"
+                for start in range(0, total, UPLOAD_SAVE_CHUNK):
+                    result = service.bulk_create_payroll_records(records[start:start + UPLOAD_SAVE_CHUNK])
+                    saved_count += result["saved"]
+
+                    done = min(start + UPLOAD_SAVE_CHUNK, total)
+                    yield json.dumps({"type": "progress", "message": f"Saving {done}/{total}..."}) + "\n"
+                db.commit()
+                invalidate_statistics_cache()
+                service.analyze()
 
                 yield json.dumps({
                     "type": "success",
@@ -697,11 +669,18 @@ async def upload_payroll_file(
 
 # ============== Export ==============
 
+def _json_array(rows):
+    """Yield the rows as a JSON array, one element at a time"""
+    yield "["
+    for i, row in enumerate(rows):
+        yield ("," if i else "") + json.dumps(row, ensure_ascii=False, default=str)
+    yield "]"
+
 @app.get("/api/export/employees")
 async def export_employees(db: sqlite3.Connection = Depends(get_db)):
     """Export all employees as JSON"""
     service = PayrollService(db)
-    return service.get_employees()
+    return StreamingResponse(_json_array(service.iter_employees()), media_type="application/json")
 
 @app.get("/api/export/payroll")
 async def export_payroll(
@@ -710,7 +689,9 @@ async def export_payroll(
 ):
     """Export payroll records as JSON"""
     service = PayrollService(db)
-    return service.get_payroll_records(period=period)
+    return StreamingResponse(
+        _json_array(service.iter_payroll_records(period=period)), media_type="application/json"
+    )
 
 @app.get("/api/export/all")
 async def export_all_data(
@@ -720,8 +701,6 @@ async def export_all_data(
     """Export all data (employees + payroll) as Excel"""
     from datetime import datetime
     service = PayrollService(db)
-    employees = service.get_employees()
-    payroll = service.get_payroll_records()
 
     if format == "excel":
         from io import BytesIO
@@ -733,25 +712,25 @@ async def export_all_data(
         # Employees sheet
         ws_emp = wb.active
         ws_emp.title = "従業員一覧"
-        if employees:
-            # Headers
-            headers = list(employees[0].keys())
-            for col, header in enumerate(headers, 1):
-                ws_emp.cell(row=1, column=col, value=header)
+        for row, emp in enumerate(service.iter_employees(), 2):
+            if row == 2:
+                # Headers
+                headers = list(emp.keys())
+                for col, header in enumerate(headers, 1):
+                    ws_emp.cell(row=1, column=col, value=header)
             # Data
-            for row, emp in enumerate(employees, 2):
-                for col, key in enumerate(headers, 1):
-                    ws_emp.cell(row=row, column=col, value=emp.get(key))
+            for col, key in enumerate(headers, 1):
+                ws_emp.cell(row=row, column=col, value=emp[key])
 
         # Payroll sheet
         ws_pay = wb.create_sheet("給与明細")
-        if payroll:
-            headers = list(payroll[0].keys())
-            for col, header in enumerate(headers, 1):
-                ws_pay.cell(row=1, column=col, value=header)
-            for row, record in enumerate(payroll, 2):
-                for col, key in enumerate(headers, 1):
-                    ws_pay.cell(row=row, column=col, value=record.get(key))
+        for row, record in enumerate(service.iter_payroll_records(), 2):
+            if row == 2:
+                headers = list(record.keys())
+                for col, header in enumerate(headers, 1):
+                    ws_pay.cell(row=1, column=col, value=header)
+            for col, key in enumerate(headers, 1):
+                ws_pay.cell(row=row, column=col, value=record[key])
 
         # Save to bytes
         output = BytesIO()
@@ -765,7 +744,7 @@ async def export_all_data(
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
 
-    return {"employees": employees, "payroll": payroll}
+    return {"employees": service.get_employees(), "payroll": service.get_payroll_records()}
 
 
 # ---------------------------------------------------------
@@ -932,12 +911,13 @@ async def sync_from_folder(
 
                 # Detect file type and parse
                 lower_name = filename.lower()
+                # Parsing is CPU-bound; keep it off the event loop so other requests are served
                 if "給" in lower_name or "給与" in lower_name or "給料" in lower_name:
                     parser = SalaryStatementParser(use_intelligent_mode=True)
-                    payroll_records = parser.parse(file_content)
+                    payroll_records = await run_in_threadpool(parser.parse, file_content)
                 else:
                     parser = ExcelParser()
-                    payroll_records = parser.parse(file_content)
+                    payroll_records = await parser.parse_async(file_content, file_path.suffix.lower())
 
                 # Insert records
                 cursor = db.cursor()
@@ -945,16 +925,15 @@ async def sync_from_folder(
                 file_saved_count = 0
 
                 try:
-                    for record_data in payroll_records:
-                        try:
-                            service.create_payroll_record(record_data)
-                            file_saved_count += 1
-                            total_saved += 1
-                        except (ValueError, TypeError, sqlite3.Error) as record_err:
-                            # Skip bad records but keep others from same file
-                            logging.warning(f"Skipping invalid record: {record_err}")
+                    # Bad records are skipped, others from the same file are kept
+                    result = service.bulk_create_payroll_records(payroll_records)
+                    file_saved_count = result["saved"]
+                    total_saved += file_saved_count
+                    if result["errors"]:
+                        logging.warning(f"Skipped {result['errors']} invalid records in {filename}")
 
                     db.commit()
+                    invalidate_statistics_cache()
                     files_processed += 1
 
                     yield json.dumps({
@@ -974,6 +953,9 @@ async def sync_from_folder(
                     "message": f"  -> Error processing {filename}: {str(e)}"
                 }) + "\n"
 
+        # One planner-statistics refresh for the whole sync, after the last commit
+        service.analyze()
+
         # Summary
         yield json.dumps({
             "type": "complete",
@@ -1278,6 +1260,7 @@ async def reset_database(
             message = "Todos los datos han sido eliminados."
 
         db.commit()
+        invalidate_statistics_cache()
 
         log_action(db, current_user, "delete", "database", target, f"Reset database: {target}")
         logging.warning(f"Database reset by {current_user.get('username')}: target={target}")
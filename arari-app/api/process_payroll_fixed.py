@@ -46,16 +46,14 @@ for idx, file_path in enumerate(xlsm_files, 1):
 
         print(f"  [OK] Encontrados {len(payroll_records)} registros")
 
-        # Save to database
-        saved_count = 0
-        for record_data in payroll_records:
-            try:
-                service.create_payroll_record(record_data)
-                saved_count += 1
-            except Exception as e:
-                # Skip old employees not in current master
-                if "not found" not in str(e):
-                    print(f"    [WARNING] Error guardando registro: {e}")
+        # Save to database (one executemany per file; old employees not in
+        # the current master are skipped and counted as errors)
+        result = service.bulk_create_payroll_records(payroll_records)
+        saved_count = result["saved"]
+        if result["errors"]:
+            print(
+                f"    [WARNING] Omitidos {result['errors']} registros (empleado no encontrado o inválido)"
+            )
 
         # CRITICAL FIX: Commit after each file
         db.commit()
@@ -70,6 +68,7 @@ for idx, file_path in enumerate(xlsm_files, 1):
 
 # Final commit (just in case)
 db.commit()
+service.analyze()
 db.close()
 
 print("\n" + "=" * 80)
@@ -7,6 +7,7 @@ from fastapi import APIRouter, Depends, HTTPException
 
 from auth_dependencies import require_admin
 from backup import BackupService
+from services import invalidate_settings_cache, invalidate_statistics_cache
 
 router = APIRouter(prefix="/api/backups", tags=["backups"])
 
@@ -53,6 +54,9 @@ async def restore_backup(
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
 
+    # The whole database was replaced, so cached settings and statistics are stale
+    invalidate_settings_cache()
+    invalidate_statistics_cache()
     return result
 
 
@@ -7,7 +7,7 @@ from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, Depends, HTTPException
 
 from auth_dependencies import log_action, require_admin, require_auth
-from database import get_db
+from database import get_db, get_read_db
 from models import Employee, EmployeeCreate
 from services import PayrollService
 
@@ -15,8 +15,8 @@ router = APIRouter(prefix="/api/employees", tags=["employees"])
 
 
 @router.get("", response_model=List[Employee])
-async def get_employees(
-    db: sqlite3.Connection = Depends(get_db),
+def get_employees(
+    db: sqlite3.Connection = Depends(get_read_db),
     search: Optional[str] = None,
     company: Optional[str] = None,
     employee_type: Optional[str] = None
@@ -27,7 +27,7 @@ async def get_employees(
 
 
 @router.get("/{employee_id}", response_model=Employee)
-async def get_employee(employee_id: str, db: sqlite3.Connection = Depends(get_db)):
+def get_employee(employee_id: str, db: sqlite3.Connection = Depends(get_read_db)):
     """Get a single employee by ID"""
     service = PayrollService(db)
     employee = service.get_employee(employee_id)
@@ -7,16 +7,16 @@ from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, Depends
 
 from auth_dependencies import log_action, require_auth
-from database import get_db
+from database import get_db, get_read_db
 from models import PayrollRecord, PayrollRecordCreate
-from services import PayrollService
+from services import PayrollService, invalidate_statistics_cache
 
 router = APIRouter(prefix="/api/payroll", tags=["payroll"])
 
 
 @router.get("", response_model=List[PayrollRecord])
-async def get_payroll_records(
-    db: sqlite3.Connection = Depends(get_db),
+def get_payroll_records(
+    db: sqlite3.Connection = Depends(get_read_db),
     period: Optional[str] = None,
     employee_id: Optional[str] = None
 ):
@@ -26,7 +26,7 @@ async def get_payroll_records(
 
 
 @router.get("/periods")
-async def get_available_periods(db: sqlite3.Connection = Depends(get_db)):
+def get_available_periods(db: sqlite3.Connection = Depends(get_read_db)):
     """Get list of available periods"""
     service = PayrollService(db)
     return service.get_available_periods()
@@ -42,5 +42,6 @@ async def create_payroll_record(
     service = PayrollService(db)
     result = service.create_payroll_record(record)
     db.commit()
+    invalidate_statistics_cache()
     log_action(db, current_user, "create", "payroll", f"{record.employee_id}_{record.period}", "Created payroll record")
     return result
@@ -1,10 +1,12 @@
 """
 Search Router - Advanced search endpoints
 """
+import json
 import sqlite3
-from typing import Optional
+from typing import Iterator, Optional
 
 from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 
 from database import get_db
 from search import SearchService
@@ -12,6 +14,12 @@ from search import SearchService
 router = APIRouter(prefix="/api/search", tags=["search"])
 
 
+def _ndjson(rows: Iterator[dict]) -> Iterator[str]:
+    """Yield each row as one line of NDJSON"""
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False, default=str) + "\n"
+
+
 @router.get("/employees")
 async def search_employees_get(
     q: Optional[str] = None,
@@ -19,13 +27,14 @@ async def search_employees_get(
     sort_order: str = "asc",
     page: int = 1,
     page_size: int = 50,
+    include_stats: bool = True,
     db: sqlite3.Connection = Depends(get_db)
 ):
     """Advanced employee search"""
     service = SearchService(db)
     return service.search_employees(
         query=q, sort_by=sort_by, sort_order=sort_order,
-        page=page, page_size=page_size
+        page=page, page_size=page_size, include_stats=include_stats
     )
 
 
@@ -42,8 +51,28 @@ async def search_employees_post(
         sort_by=payload.get("sort_by"),
         sort_order=payload.get("sort_order", "asc"),
         page=payload.get("page", 1),
-        page_size=payload.get("page_size", 50)
+        page_size=payload.get("page_size", 50),
+        include_stats=payload.get("include_stats", True)
+    )
+
+
+@router.get("/employees/stream")
+async def stream_employees(
+    q: Optional[str] = None,
+    sort_by: Optional[str] = None,
+    sort_order: str = "asc",
+    page: int = 1,
+    page_size: int = 50,
+    include_stats: bool = True,
+    db: sqlite3.Connection = Depends(get_db)
+):
+    """Employee search streamed as NDJSON (no total count)"""
+    service = SearchService(db)
+    rows = service.iter_employees(
+        query=q, sort_by=sort_by, sort_order=sort_order,
+        page=page, page_size=page_size, include_stats=include_stats
     )
+    return StreamingResponse(_ndjson(rows), media_type="application/x-ndjson")
 
 
 @router.get("/payroll")
@@ -63,6 +92,24 @@ async def search_payroll_records(
     )
 
 
+@router.get("/payroll/stream")
+async def stream_payroll_records(
+    q: Optional[str] = None,
+    sort_by: Optional[str] = None,
+    sort_order: str = "asc",
+    page: int = 1,
+    page_size: int = 50,
+    db: sqlite3.Connection = Depends(get_db)
+):
+    """Payroll search streamed as NDJSON (no total count)"""
+    service = SearchService(db)
+    rows = service.iter_payroll(
+        query=q, sort_by=sort_by, sort_order=sort_order,
+        page=page, page_size=page_size
+    )
+    return StreamingResponse(_ndjson(rows), media_type="application/x-ndjson")
+
+
 @router.get("/anomalies")
 async def find_anomalies(period: Optional[str] = None, db: sqlite3.Connection = Depends(get_db)):
     """Find data anomalies"""
@@ -6,15 +6,15 @@ from typing import Optional
 
 from fastapi import APIRouter, Depends
 
-from database import get_db
+from database import get_read_db
 from services import PayrollService
 
 router = APIRouter(prefix="/api/statistics", tags=["statistics"])
 
 
 @router.get("")
-async def get_statistics(
-    db: sqlite3.Connection = Depends(get_db),
+def get_statistics(
+    db: sqlite3.Connection = Depends(get_read_db),
     period: Optional[str] = None
 ):
     """Get dashboard statistics"""
@@ -23,8 +23,8 @@ async def get_statistics(
 
 
 @router.get("/monthly")
-async def get_monthly_statistics(
-    db: sqlite3.Connection = Depends(get_db),
+def get_monthly_statistics(
+    db: sqlite3.Connection = Depends(get_read_db),
     year: Optional[int] = None,
     month: Optional[int] = None
 ):
@@ -34,15 +34,15 @@ async def get_monthly_statistics(
 
 
 @router.get("/companies")
-async def get_company_statistics(db: sqlite3.Connection = Depends(get_db)):
+def get_company_statistics(db: sqlite3.Connection = Depends(get_read_db)):
     """Get statistics by company"""
     service = PayrollService(db)
     return service.get_company_statistics()
 
 
 @router.get("/trend")
-async def get_profit_trend(
-    db: sqlite3.Connection = Depends(get_db),
+def get_profit_trend(
+    db: sqlite3.Connection = Depends(get_read_db),
     months: int = 6
 ):
     """Get profit trend for last N months"""
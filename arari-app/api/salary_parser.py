@@ -338,7 +338,7 @@ class SalaryStatementParser:
         # Process all sheets except the summary sheet (集計) and Contract (請負)
         for sheet_name in wb.sheetnames:
             # Skip only summary and index sheets. '請負' (Ukeoi) is now ALLOWED.
-            if sheet_name in [
+            if sheet_name in {
                 "集計",
                 "Summary",
                 "目次",
@@ -346,7 +346,7 @@ class SalaryStatementParser:
                 "請負",
                 "DBUkeoiX",
                 "請負社員",
-            ]:
+            }:
                 print(f"[DEBUG] Skipping sheet: {sheet_name}")
                 continue
 
@@ -609,7 +609,7 @@ class SalaryStatementParser:
                     continue
 
                 # Name Detection
-                if val in ["氏名", "氏　名", "名前"]:
+                if val in {"氏名", "氏　名", "名前"}:
                     # Name is likely in next column or 2 columns over
                     possible_name = str(
                         ws.cell(row=r, column=c + 1).value or ""
@@ -624,7 +624,7 @@ class SalaryStatementParser:
                         name_found = True
 
                 # ID Detection
-                if val in ["社員No", "社員No.", "社員番号", "NO.", "No."]:
+                if val in {"社員No", "社員No.", "社員番号", "NO.", "No."}:
                     possible_id = str(ws.cell(row=r, column=c + 1).value or "").strip()
                     # If C+1 is empty, try C+2
                     if not possible_id:
@@ -977,7 +977,7 @@ class SalaryStatementParser:
             label_str = str(label).strip()
 
             # Skip if empty or just whitespace
-            if not label_str or label_str in ["", "給", "額"]:
+            if not label_str or label_str in {"", "給", "額"}:
                 continue
 
             # Get the value (yen amount)
@@ -6,9 +6,36 @@ Supports both SQLite (local) and PostgreSQL (Railway production)
 
 import sqlite3
 from dataclasses import dataclass
-from typing import Any, Dict, List
-
-from database import USE_POSTGRES
+from typing import Any, Dict, Iterator, List
+
+from database import USE_POSTGRES, iter_rows_as_dicts
+
+# Anomaly category -> key holding the offending value in each result dict
+ANOMALY_VALUE_KEYS = {
+    "negative_margin": "margin",
+    "high_margin": "margin",
+    "excessive_hours": "hours",
+    "missing_billing": "billing",
+    "zero_salary": "salary",
+}
+
+# Anomaly rules: (kind, value column, condition). "{t}" is the payroll row alias,
+# so the same rules drive the ad-hoc query and the flag-maintenance triggers.
+ANOMALY_RULES = [
+    ("negative_margin", "profit_margin", "{t}.profit_margin < 0"),
+    ("high_margin", "profit_margin", "{t}.profit_margin > 40"),
+    ("excessive_hours", "work_hours", "{t}.work_hours > 250"),
+    (
+        "missing_billing",
+        "billing_amount",
+        "({t}.billing_amount IS NULL OR {t}.billing_amount = 0) AND {t}.work_hours > 0",
+    ),
+    (
+        "zero_salary",
+        "gross_salary",
+        "({t}.gross_salary IS NULL OR {t}.gross_salary = 0) AND {t}.work_hours > 0",
+    ),
+]
 
 
 def _q(query: str) -> str:
@@ -27,6 +54,325 @@ def _get_count(row) -> int:
     return row[0] if row[0] is not None else 0
 
 
+# Filter operator -> (SQL template, params builder), built once at import time
+FILTER_OPERATORS = {
+    "eq": (" AND {field} = ?", lambda v, v2: [v]),
+    "ne": (" AND {field} != ?", lambda v, v2: [v]),
+    "gt": (" AND {field} > ?", lambda v, v2: [v]),
+    "gte": (" AND {field} >= ?", lambda v, v2: [v]),
+    "lt": (" AND {field} < ?", lambda v, v2: [v]),
+    "lte": (" AND {field} <= ?", lambda v, v2: [v]),
+    "like": (" AND {field} LIKE ?", lambda v, v2: [f"%{v}%"]),
+    "between": (" AND {field} BETWEEN ? AND ?", lambda v, v2: [v, v2]),
+}
+
+
+def _build_filter_clause(db_field: str, operator: str, value: Any, value2: Any = None) -> tuple:
+    """
+    Build a single filter clause for a validated column.
+    Returns (sql_clause, params) tuple; empty clause for unknown/invalid operators.
+    """
+    if operator == "in":
+        if not isinstance(value, list):
+            return ("", [])
+        placeholders = ",".join(["?"] * len(value))
+        return (f" AND {db_field} IN ({placeholders})", list(value))
+
+    if operator == "between" and value2 is None:
+        return ("", [])
+
+    op = FILTER_OPERATORS.get(operator)
+    if op is None:
+        return ("", [])
+    template, build_params = op
+    return (template.format(field=db_field), build_params(value, value2))
+
+
+# Sortable columns per search type (validated whitelist for ORDER BY)
+EMPLOYEE_SORT_FIELDS = {
+    "employee_id": "e.employee_id",
+    "name": "e.name",
+    "company": "e.dispatch_company",
+    "hourly_rate": "e.hourly_rate",
+    "billing_rate": "e.billing_rate",
+    "margin": "avg_margin",
+    "status": "e.status",
+}
+
+PAYROLL_SORT_FIELDS = {
+    "period": "p.period",
+    "employee": "e.name",
+    "company": "e.dispatch_company",
+    "margin": "p.profit_margin",
+    "profit": "p.gross_profit",
+    "revenue": "p.billing_amount",
+}
+
+# "in" filters with more values than this are materialized into an indexed
+# temp table (SQLite) instead of a long IN (?, ?, ...) list probed per row
+IN_MATERIALIZE_THRESHOLD = 32
+
+# Suggestion field -> employees columns searched
+SUGGESTION_COLUMNS = {
+    "all": ["name", "dispatch_company", "employee_id"],
+    "employee": ["name"],
+    "company": ["dispatch_company"],
+    "id": ["employee_id"],
+}
+
+
+def _clamp_page(page: int, page_size: int) -> tuple:
+    """Validate bounds to prevent DoS via huge LIMIT values. Returns (page, page_size)."""
+    page = max(1, min(page, 10000))  # Cap page at 10000
+    page_size = max(1, min(page_size, 500))  # Cap page_size at 500
+    return page, page_size
+
+
+def init_search_tables(conn):
+    """
+    Initialize the trigram FTS5 index used for search suggestions (SQLite).
+    On PostgreSQL, only the pg_trgm indexes for the employee list search are created.
+
+    suggest_fts mirrors employees (rowid = employees.id) and is kept in sync by
+    triggers. The trigram tokenizer (SQLite >= 3.34) makes infix MATCH queries
+    index-backed, which plain LIKE '%q%' scans are not.
+    """
+    if USE_POSTGRES:
+        _init_employee_trigram_indexes(conn)
+        return
+
+    cursor = conn.cursor()
+
+    # Anomaly flags are plain tables and triggers: commit them before the FTS5
+    # setup, which fails on SQLite builds without FTS5 or the trigram tokenizer
+    _init_anomaly_flags(cursor)
+    conn.commit()
+
+    _init_suggest_index(cursor)
+    _init_employee_search_index(cursor)
+
+    conn.commit()
+
+
+def _init_suggest_index(cursor):
+    """
+    Maintain suggest_fts: a trigram FTS5 index over the columns
+    SearchService.get_search_suggestions matches (rowid = employees.id).
+    """
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'suggest_fts'"
+    )
+    exists = cursor.fetchone() is not None
+
+    cursor.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS suggest_fts
+        USING fts5(name, dispatch_company, employee_id, tokenize='trigram')
+    """
+    )
+
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_employees_suggest_insert
+        AFTER INSERT ON employees BEGIN
+            INSERT INTO suggest_fts (rowid, name, dispatch_company, employee_id)
+            VALUES (new.id, new.name, new.dispatch_company, new.employee_id);
+        END
+    """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_employees_suggest_delete
+        AFTER DELETE ON employees BEGIN
+            DELETE FROM suggest_fts WHERE rowid = old.id;
+        END
+    """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_employees_suggest_update
+        AFTER UPDATE OF name, dispatch_company, employee_id ON employees BEGIN
+            DELETE FROM suggest_fts WHERE rowid = old.id;
+            INSERT INTO suggest_fts (rowid, name, dispatch_company, employee_id)
+            VALUES (new.id, new.name, new.dispatch_company, new.employee_id);
+        END
+    """
+    )
+
+    # Backfill existing employees the first time the index is created
+    if not exists:
+        cursor.execute(
+            """
+            INSERT INTO suggest_fts (rowid, name, dispatch_company, employee_id)
+            SELECT id, name, dispatch_company, employee_id FROM employees
+        """
+        )
+
+
+def _init_employee_search_index(cursor):
+    """
+    Maintain employees_fts: a trigram FTS5 index over the columns the
+    employee list searches (employee_id, name, name_kana), so
+    PayrollService.get_employees narrows LIKE '%q%' to indexed candidates.
+    Same rowid/trigger scheme as suggest_fts.
+    """
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'employees_fts'"
+    )
+    exists = cursor.fetchone() is not None
+
+    cursor.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS employees_fts
+        USING fts5(employee_id, name, name_kana, tokenize='trigram')
+    """
+    )
+
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_employees_fts_insert
+        AFTER INSERT ON employees BEGIN
+            INSERT INTO employees_fts (rowid, employee_id, name, name_kana)
+            VALUES (new.id, new.employee_id, new.name, new.name_kana);
+        END
+    """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_employees_fts_delete
+        AFTER DELETE ON employees BEGIN
+            DELETE FROM employees_fts WHERE rowid = old.id;
+        END
+    """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_employees_fts_update
+        AFTER UPDATE OF employee_id, name, name_kana ON employees BEGIN
+            DELETE FROM employees_fts WHERE rowid = old.id;
+            INSERT INTO employees_fts (rowid, employee_id, name, name_kana)
+            VALUES (new.id, new.employee_id, new.name, new.name_kana);
+        END
+    """
+    )
+
+    # Backfill existing employees the first time the index is created
+    if not exists:
+        cursor.execute(
+            """
+            INSERT INTO employees_fts (rowid, employee_id, name, name_kana)
+            SELECT id, employee_id, name, name_kana FROM employees
+        """
+        )
+
+
+def _init_employee_trigram_indexes(conn):
+    """
+    PostgreSQL counterpart of employees_fts: pg_trgm GIN indexes on the
+    columns PayrollService.get_employees searches, so its OR of
+    LIKE '%q%' tests becomes a bitmap index scan instead of a sequential scan.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for column in ("employee_id", "name", "name_kana"):
+            cursor.execute(
+                f"""
+                CREATE INDEX IF NOT EXISTS idx_employees_{column}_trgm
+                ON employees USING gin ({column} gin_trgm_ops)
+            """
+            )
+        conn.commit()
+    except Exception:
+        # e.g. no privilege to create the extension: searches keep the plain
+        # LIKE scan, and the aborted transaction must not poison later setup
+        conn.rollback()
+        raise
+
+
+def _init_anomaly_flags(cursor):
+    """
+    Maintain payroll_anomaly_flags: one (payroll_rowid, kind) row per
+    ANOMALY_RULES hit, refreshed by triggers on every payroll write so
+    find_anomalies is an indexed lookup instead of five full scans.
+    """
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'payroll_anomaly_flags'"
+    )
+    exists = cursor.fetchone() is not None
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS payroll_anomaly_flags (
+            payroll_rowid INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            PRIMARY KEY (payroll_rowid, kind)
+        )
+    """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_paf_kind
+        ON payroll_anomaly_flags(kind)
+    """
+    )
+
+    flag_inserts = "\n".join(
+        f"""
+            INSERT OR IGNORE INTO payroll_anomaly_flags (payroll_rowid, kind)
+            SELECT new.id, '{kind}' WHERE {condition.format(t="new")};"""
+        for kind, _, condition in ANOMALY_RULES
+    )
+
+    # BEFORE INSERT clears the row an INSERT OR REPLACE is about to replace
+    # (REPLACE deletes don't fire DELETE triggers)
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_payroll_flags_before_insert
+        BEFORE INSERT ON payroll_records BEGIN
+            DELETE FROM payroll_anomaly_flags WHERE payroll_rowid IN (
+                SELECT id FROM payroll_records
+                WHERE employee_id = new.employee_id AND period = new.period
+            );
+        END
+    """
+    )
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_payroll_flags_insert
+        AFTER INSERT ON payroll_records BEGIN{flag_inserts}
+        END
+    """
+    )
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_payroll_flags_update
+        AFTER UPDATE ON payroll_records BEGIN
+            DELETE FROM payroll_anomaly_flags WHERE payroll_rowid = old.id;{flag_inserts}
+        END
+    """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_payroll_flags_delete
+        AFTER DELETE ON payroll_records BEGIN
+            DELETE FROM payroll_anomaly_flags WHERE payroll_rowid = old.id;
+        END
+    """
+    )
+
+    # Backfill existing payroll rows the first time the table is created
+    if not exists:
+        for kind, _, condition in ANOMALY_RULES:
+            cursor.execute(
+                f"""
+                INSERT OR IGNORE INTO payroll_anomaly_flags (payroll_rowid, kind)
+                SELECT p.id, '{kind}' FROM payroll_records p
+                WHERE {condition.format(t="p")}
+            """
+            )
+
+
 @dataclass
 class SearchFilter:
     field: str
@@ -41,21 +387,52 @@ class SearchService:
     def __init__(self, conn: sqlite3.Connection):
         self.conn = conn
         self.cursor = conn.cursor()
+        self._in_filter_tables = 0
+
+    def _filter_clause(self, db_field: str, operator: str, value: Any, value2: Any = None) -> tuple:
+        """Build a filter clause, materializing large "in" lists into a temp table"""
+        if (
+            operator == "in"
+            and isinstance(value, list)
+            and len(value) > IN_MATERIALIZE_THRESHOLD
+            and not USE_POSTGRES
+        ):
+            table = self._materialize_in_values(value)
+            return (f" AND {db_field} IN (SELECT v FROM {table})", [])
+        return _build_filter_clause(db_field, operator, value, value2)
+
+    def _materialize_in_values(self, values: List[Any]) -> str:
+        """Load values into an indexed per-connection temp table. Returns the table name."""
+        table = f"_in_filter_{self._in_filter_tables}"
+        self._in_filter_tables += 1
+        # PRIMARY KEY gives the index; WITHOUT ROWID keeps it a single b-tree
+        self.cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {table} (v PRIMARY KEY) WITHOUT ROWID"
+        )
+        self.cursor.execute(f"DELETE FROM {table}")
+        self.cursor.executemany(
+            f"INSERT OR IGNORE INTO {table} (v) VALUES (?)", ((v,) for v in values)
+        )
+        return table
 
-    def search_employees(
+    def _build_employee_search(
         self,
         query: str = None,
         filters: List[Dict] = None,
         sort_by: str = None,
-        sort_order: str = "asc",
-        page: int = 1,
-        page_size: int = 50,
-    ) -> Dict[str, Any]:
-        """Advanced employee search"""
-        sql = """
-            SELECT e.*,
+        include_stats: bool = True,
+    ) -> tuple:
+        """Build the filtered (unsorted, unpaginated) employee search. Returns (sql, params)."""
+        if include_stats or sort_by == "margin":
+            stats_columns = """
                    (SELECT AVG(profit_margin) FROM payroll_records WHERE employee_id = e.employee_id) as avg_margin,
-                   (SELECT COUNT(*) FROM payroll_records WHERE employee_id = e.employee_id) as record_count
+                   (SELECT COUNT(*) FROM payroll_records WHERE employee_id = e.employee_id) as record_count"""
+        else:
+            stats_columns = """
+                   EXISTS(SELECT 1 FROM payroll_records WHERE employee_id = e.employee_id) as has_records"""
+
+        sql = f"""
+            SELECT e.*,{stats_columns}
             FROM employees e
             WHERE 1=1
         """
@@ -95,68 +472,42 @@ class SearchService:
                 if field not in allowed_fields:
                     continue
 
-                if operator == "eq":
-                    sql += f" AND e.{field} = ?"
-                    params.append(value)
-                elif operator == "ne":
-                    sql += f" AND e.{field} != ?"
-                    params.append(value)
-                elif operator == "gt":
-                    sql += f" AND e.{field} > ?"
-                    params.append(value)
-                elif operator == "gte":
-                    sql += f" AND e.{field} >= ?"
-                    params.append(value)
-                elif operator == "lt":
-                    sql += f" AND e.{field} < ?"
-                    params.append(value)
-                elif operator == "lte":
-                    sql += f" AND e.{field} <= ?"
-                    params.append(value)
-                elif operator == "like":
-                    sql += f" AND e.{field} LIKE ?"
-                    params.append(f"%{value}%")
-                elif operator == "in" and isinstance(value, list):
-                    placeholders = ",".join(["?"] * len(value))
-                    sql += f" AND e.{field} IN ({placeholders})"
-                    params.extend(value)
-                elif operator == "between" and value2 is not None:
-                    sql += f" AND e.{field} BETWEEN ? AND ?"
-                    params.extend([value, value2])
+                clause, clause_params = self._filter_clause(
+                    f"e.{field}", operator, value, value2
+                )
+                sql += clause
+                params.extend(clause_params)
 
-        # Get total count before pagination
-        count_sql = f"SELECT COUNT(*) FROM ({sql})"
-        self.cursor.execute(_q(count_sql), params)
-        total_count = _get_count(self.cursor.fetchone())
-
-        # Sorting
-        sort_fields = {
-            "employee_id": "e.employee_id",
-            "name": "e.name",
-            "company": "e.dispatch_company",
-            "hourly_rate": "e.hourly_rate",
-            "billing_rate": "e.billing_rate",
-            "margin": "avg_margin",
-            "status": "e.status",
-        }
+        return sql, params
 
-        if sort_by and sort_by in sort_fields:
-            order = "DESC" if sort_order.lower() == "desc" else "ASC"
-            sql += f" ORDER BY {sort_fields[sort_by]} {order}"
-        else:
-            sql += " ORDER BY e.employee_id"
+    def search_employees(
+        self,
+        query: str = None,
+        filters: List[Dict] = None,
+        sort_by: str = None,
+        sort_order: str = "asc",
+        page: int = 1,
+        page_size: int = 50,
+        include_stats: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Advanced employee search
 
-        # Pagination - Use parameterized queries to prevent SQL injection
-        # Validate bounds to prevent DoS via huge LIMIT values
-        page = max(1, min(page, 10000))  # Cap page at 10000
-        page_size = max(1, min(page_size, 500))  # Cap page_size at 500
-        offset = (page - 1) * page_size
-        sql += " LIMIT ? OFFSET ?"
-        params.extend([page_size, offset])
+        With include_stats=False the per-employee avg_margin/record_count
+        aggregates are replaced by a cheap has_records EXISTS flag (kept when
+        sorting by margin, which needs avg_margin).
+        """
+        sql, params = self._build_employee_search(query, filters, sort_by, include_stats)
 
-        self.cursor.execute(sql, params)
-        columns = [desc[0] for desc in self.cursor.description]
-        results = [dict(zip(columns, row)) for row in self.cursor.fetchall()]
+        # Get total count before pagination
+        total_count = self._count(sql, params)
+
+        page, page_size = _clamp_page(page, page_size)
+        self._execute_page(
+            sql, params, EMPLOYEE_SORT_FIELDS, "e.employee_id",
+            sort_by, sort_order, page, page_size,
+        )
+        results = list(iter_rows_as_dicts(self.cursor))
 
         return {
             "results": results,
@@ -166,7 +517,7 @@ class SearchService:
             "total_pages": (total_count + page_size - 1) // page_size,
         }
 
-    def search_payroll(
+    def iter_employees(
         self,
         query: str = None,
         filters: List[Dict] = None,
@@ -174,8 +525,21 @@ class SearchService:
         sort_order: str = "asc",
         page: int = 1,
         page_size: int = 50,
-    ) -> Dict[str, Any]:
-        """Advanced payroll search"""
+        include_stats: bool = True,
+    ) -> Iterator[Dict[str, Any]]:
+        """Streaming variant of search_employees: yields one page of rows without a total"""
+        sql, params = self._build_employee_search(query, filters, sort_by, include_stats)
+        page, page_size = _clamp_page(page, page_size)
+        self._execute_page(
+            sql, params, EMPLOYEE_SORT_FIELDS, "e.employee_id",
+            sort_by, sort_order, page, page_size,
+        )
+        return iter_rows_as_dicts(self.cursor)
+
+    def _build_payroll_search(
+        self, query: str = None, filters: List[Dict] = None
+    ) -> tuple:
+        """Build the filtered (unsorted, unpaginated) payroll search. Returns (sql, params)."""
         sql = """
             SELECT p.*, e.name as employee_name, e.dispatch_company
             FROM payroll_records p
@@ -222,67 +586,35 @@ class SearchService:
 
                 db_field = field_map[field]
 
-                if operator == "eq":
-                    sql += f" AND {db_field} = ?"
-                    params.append(value)
-                elif operator == "ne":
-                    sql += f" AND {db_field} != ?"
-                    params.append(value)
-                elif operator == "gt":
-                    sql += f" AND {db_field} > ?"
-                    params.append(value)
-                elif operator == "gte":
-                    sql += f" AND {db_field} >= ?"
-                    params.append(value)
-                elif operator == "lt":
-                    sql += f" AND {db_field} < ?"
-                    params.append(value)
-                elif operator == "lte":
-                    sql += f" AND {db_field} <= ?"
-                    params.append(value)
-                elif operator == "like":
-                    sql += f" AND {db_field} LIKE ?"
-                    params.append(f"%{value}%")
-                elif operator == "in" and isinstance(value, list):
-                    placeholders = ",".join(["?"] * len(value))
-                    sql += f" AND {db_field} IN ({placeholders})"
-                    params.extend(value)
-                elif operator == "between" and value2 is not None:
-                    sql += f" AND {db_field} BETWEEN ? AND ?"
-                    params.extend([value, value2])
+                clause, clause_params = self._filter_clause(
+                    db_field, operator, value, value2
+                )
+                sql += clause
+                params.extend(clause_params)
 
-        # Get total count
-        count_sql = f"SELECT COUNT(*) FROM ({sql})"
-        self.cursor.execute(_q(count_sql), params)
-        total_count = _get_count(self.cursor.fetchone())
-
-        # Sorting
-        sort_fields = {
-            "period": "p.period",
-            "employee": "e.name",
-            "company": "e.dispatch_company",
-            "margin": "p.profit_margin",
-            "profit": "p.gross_profit",
-            "revenue": "p.billing_amount",
-        }
+        return sql, params
 
-        if sort_by and sort_by in sort_fields:
-            order = "DESC" if sort_order.lower() == "desc" else "ASC"
-            sql += f" ORDER BY {sort_fields[sort_by]} {order}"
-        else:
-            sql += " ORDER BY p.period DESC, p.employee_id"
+    def search_payroll(
+        self,
+        query: str = None,
+        filters: List[Dict] = None,
+        sort_by: str = None,
+        sort_order: str = "asc",
+        page: int = 1,
+        page_size: int = 50,
+    ) -> Dict[str, Any]:
+        """Advanced payroll search"""
+        sql, params = self._build_payroll_search(query, filters)
 
-        # Pagination - Use parameterized queries to prevent SQL injection
-        # Validate bounds to prevent DoS via huge LIMIT values
-        page = max(1, min(page, 10000))  # Cap page at 10000
-        page_size = max(1, min(page_size, 500))  # Cap page_size at 500
-        offset = (page - 1) * page_size
-        sql += " LIMIT ? OFFSET ?"
-        params.extend([page_size, offset])
+        # Get total count
+        total_count = self._count(sql, params)
 
-        self.cursor.execute(sql, params)
-        columns = [desc[0] for desc in self.cursor.description]
-        results = [dict(zip(columns, row)) for row in self.cursor.fetchall()]
+        page, page_size = _clamp_page(page, page_size)
+        self._execute_page(
+            sql, params, PAYROLL_SORT_FIELDS, "p.period DESC, p.employee_id",
+            sort_by, sort_order, page, page_size,
+        )
+        results = list(iter_rows_as_dicts(self.cursor))
 
         return {
             "results": results,
@@ -292,6 +624,52 @@ class SearchService:
             "total_pages": (total_count + page_size - 1) // page_size,
         }
 
+    def iter_payroll(
+        self,
+        query: str = None,
+        filters: List[Dict] = None,
+        sort_by: str = None,
+        sort_order: str = "asc",
+        page: int = 1,
+        page_size: int = 50,
+    ) -> Iterator[Dict[str, Any]]:
+        """Streaming variant of search_payroll: yields one page of rows without a total"""
+        sql, params = self._build_payroll_search(query, filters)
+        page, page_size = _clamp_page(page, page_size)
+        self._execute_page(
+            sql, params, PAYROLL_SORT_FIELDS, "p.period DESC, p.employee_id",
+            sort_by, sort_order, page, page_size,
+        )
+        return iter_rows_as_dicts(self.cursor)
+
+    def _count(self, sql: str, params: List) -> int:
+        """Count rows of a search query before pagination"""
+        count_sql = f"SELECT COUNT(*) FROM ({sql})"
+        self.cursor.execute(_q(count_sql), params)
+        return _get_count(self.cursor.fetchone())
+
+    def _execute_page(
+        self,
+        sql: str,
+        params: List,
+        sort_fields: Dict[str, str],
+        default_order: str,
+        sort_by: str,
+        sort_order: str,
+        page: int,
+        page_size: int,
+    ) -> None:
+        """Execute a search query with sorting and LIMIT/OFFSET applied"""
+        if sort_by and sort_by in sort_fields:
+            order = "DESC" if sort_order.lower() == "desc" else "ASC"
+            sql += f" ORDER BY {sort_fields[sort_by]} {order}"
+        else:
+            sql += f" ORDER BY {default_order}"
+
+        # Pagination - Use parameterized queries to prevent SQL injection
+        sql += " LIMIT ? OFFSET ?"
+        self.cursor.execute(_q(sql), list(params) + [page_size, (page - 1) * page_size])
+
     def search_by_margin_range(
         self, min_margin: float = None, max_margin: float = None, period: str = None
     ) -> List[Dict[str, Any]]:
@@ -339,82 +717,43 @@ class SearchService:
             base_where += " AND p.period = ?"
             params.append(period)
 
-        # Negative margin
-        self.cursor.execute(
-            f"""
-            SELECT p.employee_id, p.period, p.profit_margin, e.name
-            FROM payroll_records p
-            JOIN employees e ON p.employee_id = e.employee_id
-            {base_where} AND p.profit_margin < 0
-        """,
-            params,
-        )
-        anomalies["negative_margin"] = [
-            {"employee_id": r[0], "period": r[1], "margin": r[2], "name": r[3]}
-            for r in self.cursor.fetchall()
-        ]
-
-        # High margin (>40%)
-        self.cursor.execute(
-            f"""
-            SELECT p.employee_id, p.period, p.profit_margin, e.name
-            FROM payroll_records p
-            JOIN employees e ON p.employee_id = e.employee_id
-            {base_where} AND p.profit_margin > 40
-        """,
-            params,
-        )
-        anomalies["high_margin"] = [
-            {"employee_id": r[0], "period": r[1], "margin": r[2], "name": r[3]}
-            for r in self.cursor.fetchall()
-        ]
-
-        # Excessive hours (>250)
-        self.cursor.execute(
-            f"""
-            SELECT p.employee_id, p.period, p.work_hours, e.name
-            FROM payroll_records p
-            JOIN employees e ON p.employee_id = e.employee_id
-            {base_where} AND p.work_hours > 250
-        """,
-            params,
-        )
-        anomalies["excessive_hours"] = [
-            {"employee_id": r[0], "period": r[1], "hours": r[2], "name": r[3]}
-            for r in self.cursor.fetchall()
-        ]
-
-        # Missing billing
-        self.cursor.execute(
-            f"""
-            SELECT p.employee_id, p.period, p.billing_amount, e.name
-            FROM payroll_records p
-            JOIN employees e ON p.employee_id = e.employee_id
-            {base_where} AND (p.billing_amount IS NULL OR p.billing_amount = 0)
-            AND p.work_hours > 0
-        """,
-            params,
-        )
-        anomalies["missing_billing"] = [
-            {"employee_id": r[0], "period": r[1], "billing": r[2], "name": r[3]}
-            for r in self.cursor.fetchall()
-        ]
-
-        # Zero salary with hours
-        self.cursor.execute(
-            f"""
-            SELECT p.employee_id, p.period, p.gross_salary, e.name
-            FROM payroll_records p
-            JOIN employees e ON p.employee_id = e.employee_id
-            {base_where} AND (p.gross_salary IS NULL OR p.gross_salary = 0)
-            AND p.work_hours > 0
-        """,
-            params,
-        )
-        anomalies["zero_salary"] = [
-            {"employee_id": r[0], "period": r[1], "salary": r[2], "name": r[3]}
-            for r in self.cursor.fetchall()
-        ]
+        if USE_POSTGRES:
+            # All five checks in one round trip; `kind` tags which check matched
+            sql = " UNION ALL ".join(
+                f"""
+                SELECT '{kind}' as kind, p.employee_id, p.period, p.{column} as value, e.name
+                FROM payroll_records p
+                JOIN employees e ON p.employee_id = e.employee_id
+                {base_where} AND {condition.format(t="p")}
+                """
+                for kind, column, condition in ANOMALY_RULES
+            )
+            params = params * len(ANOMALY_RULES)
+        else:
+            # Flags are precomputed by triggers (see _init_anomaly_flags)
+            value_case = " ".join(
+                f"WHEN '{kind}' THEN p.{column}" for kind, column, _ in ANOMALY_RULES
+            )
+            sql = f"""
+                SELECT f.kind, p.employee_id, p.period,
+                       CASE f.kind {value_case} END as value, e.name
+                FROM payroll_anomaly_flags f
+                JOIN payroll_records p ON p.id = f.payroll_rowid
+                JOIN employees e ON p.employee_id = e.employee_id
+                {base_where}
+            """
+        self.cursor.execute(_q(sql), params)
+        rows = self.cursor.fetchall()
+
+        for r in rows:
+            anomalies[r[0]].append(
+                {
+                    "employee_id": r[1],
+                    "period": r[2],
+                    ANOMALY_VALUE_KEYS[r[0]]: r[3],
+                    "name": r[4],
+                }
+            )
 
         # Count totals
         total_anomalies = sum(len(v) for v in anomalies.values())
@@ -429,36 +768,77 @@ class SearchService:
         self, query: str, field: str = "all", limit: int = 10
     ) -> List[str]:
         """Get search suggestions based on existing data"""
-        suggestions = set()
-
         if not query or len(query) < 2:
             return []
 
+        # Trigram MATCH needs at least 3 characters; 2-char queries (common
+        # for Japanese names) and non-SQLite backends use the LIKE scans
+        if not USE_POSTGRES and len(query) >= 3:
+            try:
+                return self._fts_suggestions(query, field, limit)
+            except sqlite3.OperationalError:
+                pass  # FTS5/trigram unavailable - fall back to LIKE
+
+        return self._like_suggestions(query, field, limit)
+
+    def _fts_suggestions(self, query: str, field: str, limit: int) -> List[str]:
+        """Suggestions from trigram FTS5 queries over the requested columns"""
+        columns = SUGGESTION_COLUMNS.get(field, [])
+        if not columns:
+            return []
+
+        # Quoted phrase (embedded quotes are doubled)
+        phrase = '"' + query.replace('"', '""') + '"'
+        search_term = f"%{query}%"
+        suggestions = set()
+
+        # One DISTINCT query per column, so the limit counts values rather
+        # than rows (many employees share a company), matching the LIKE path.
+        # Join back to employees so values are current (REPLACE bypasses
+        # triggers); the LIKE check drops stale index hits before LIMIT counts them
+        for column in columns:
+            self.cursor.execute(
+                f"""
+                SELECT DISTINCT e.{column}
+                FROM suggest_fts
+                JOIN employees e ON e.id = suggest_fts.rowid
+                WHERE suggest_fts MATCH ? AND e.{column} LIKE ?
+                LIMIT ?
+            """,
+                (f"{column} : {phrase}", search_term, limit),
+            )
+            suggestions.update(r[0] for r in self.cursor.fetchall())
+
+        return sorted(suggestions)[:limit]
+
+    def _like_suggestions(self, query: str, field: str, limit: int) -> List[str]:
+        """Suggestions via LIKE '%q%' scans"""
+        suggestions = set()
         search_term = f"%{query}%"
 
         if field in ["all", "employee"]:
             self.cursor.execute(
-                """
+                _q("""
                 SELECT DISTINCT name FROM employees WHERE name LIKE ? LIMIT ?
-            """,
+            """),
                 (search_term, limit),
             )
             suggestions.update(r[0] for r in self.cursor.fetchall())
 
         if field in ["all", "company"]:
             self.cursor.execute(
-                """
+                _q("""
                 SELECT DISTINCT dispatch_company FROM employees WHERE dispatch_company LIKE ? LIMIT ?
-            """,
+            """),
                 (search_term, limit),
             )
             suggestions.update(r[0] for r in self.cursor.fetchall())
 
         if field in ["all", "id"]:
             self.cursor.execute(
-                """
+                _q("""
                 SELECT DISTINCT employee_id FROM employees WHERE employee_id LIKE ? LIMIT ?
-            """,
+            """),
                 (search_term, limit),
             )
             suggestions.update(r[0] for r in self.cursor.fetchall())
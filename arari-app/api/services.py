@@ -3,14 +3,160 @@ Business logic services for 粗利 PRO
 Supports both SQLite (local) and PostgreSQL (Railway production)
 """
 
+import asyncio
+import codecs
+import copy
 import csv
+import inspect
 import io
+import json
+import re
 import sqlite3
-from typing import Any, Dict, List, Optional
-
-from database import USE_POSTGRES
+import threading
+import unicodedata
+import uuid
+from functools import lru_cache, wraps
+from itertools import product
+from operator import attrgetter
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+from cache import CacheService, invalidate_stats_cache
+from database import USE_POSTGRES, iter_rows_as_dicts
 from models import EmployeeCreate, PayrollRecordCreate
 
+# pandas is optional; CSV uploads are parsed with its C reader when present
+try:
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+# numpy is optional; large bulk imports derive cost/profit columns with it when present
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# psycopg2 is only needed (and installed) when running against PostgreSQL
+if USE_POSTGRES:
+    import psycopg2
+    from psycopg2.extras import execute_values
+
+    _DB_ERROR = psycopg2.Error
+else:
+    _DB_ERROR = sqlite3.Error
+
+# Above this many records, the vectorized cost calculation beats the per-record loop
+NUMPY_BULK_THRESHOLD = 256
+
+# Once the payroll rows written since the last ANALYZE reach this share of
+# payroll_records, PayrollService.analyze() refreshes the planner statistics
+# (e.g. after the first import into a freshly created table)
+ANALYZE_CHANGE_RATIO = 0.25
+
+# Payroll rows written since the last ANALYZE. Process-wide, because one
+# import is saved through many requests/chunks and service instances
+_payroll_changes_lock = threading.Lock()
+_payroll_rows_changed = 0
+
+
+def _count_payroll_changes(rows: int) -> None:
+    global _payroll_rows_changed
+    with _payroll_changes_lock:
+        _payroll_rows_changed += rows
+
+
+# Dashboard statistics are cached in-process for STATS_CACHE_TTL seconds and
+# invalidated whenever PayrollService writes employees, payroll or settings
+STATS_CACHE_TTL = 60
+_stats_cache = CacheService(default_ttl=STATS_CACHE_TTL)
+
+
+def invalidate_statistics_cache() -> None:
+    """Drop cached statistics (call after writing employees/payroll outside PayrollService)"""
+    invalidate_stats_cache(_stats_cache)
+
+
+# Settings change rarely but are read on every payroll write; cached per
+# process and dropped whenever PayrollService.update_setting commits
+SETTINGS_CACHE_TTL = 300
+_settings_cache = CacheService(default_ttl=SETTINGS_CACHE_TTL)
+
+
+def invalidate_settings_cache() -> None:
+    """Drop cached settings values (call after writing settings outside PayrollService)"""
+    _settings_cache.clear("settings:*")
+
+
+def _cached_statistics(method):
+    """
+    Cache a PayrollService statistics method keyed by method name and arguments.
+
+    Arguments are bound to the signature (defaults applied), so positional and
+    keyword calls share one entry. Callers get a deep copy, so changing a
+    result cannot alter what later requests are served from the cache.
+    """
+    signature = inspect.signature(method)
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        key_parts = ["stats", method.__name__]
+        key_parts.extend(f"{k}={v}" for k, v in list(bound.arguments.items())[1:])
+        cache_key = ":".join(key_parts)
+
+        cached_value = _stats_cache.get(cache_key)
+        if cached_value is not None:
+            return copy.deepcopy(cached_value)
+
+        result = method(self, *args, **kwargs)
+        _stats_cache.set(cache_key, result)
+        return copy.deepcopy(result)
+
+    return wrapper
+
+
+# Characters LIKE treats as wildcards
+_LIKE_WILDCARDS = frozenset("%_")
+
+# Currency symbols, thousands separators and whitespace stripped from numeric cells
+_CURRENCY_RE = re.compile(r"[¥,\s]")
+
+# Wider strip set for the NFKC-normalized retry: other currency signs too
+_STRIP_RE = re.compile(r"[¥$€£,\s]")
+
+
+@lru_cache(maxsize=2048)
+def _parse_numeric_str(value: str) -> float:
+    """
+    Parse numeric cell text such as "¥250,000"; blank or unparseable text is 0.
+
+    Payroll sheets repeat the same few strings ("", "0", "¥0") across most
+    cells, so results are memoized. The cache is bounded, so it does not
+    need clearing between imports.
+    """
+    cleaned = _CURRENCY_RE.sub("", value)
+    if not cleaned:
+        # Blank cell - no need to go through float()'s ValueError
+        return 0
+    try:
+        return float(cleaned)
+    except ValueError:
+        pass
+    # Full-width input ("１，２３４", "￥500") or other currency signs
+    cleaned = _STRIP_RE.sub("", unicodedata.normalize("NFKC", value))
+    try:
+        return float(cleaned)
+    except ValueError:
+        return 0
+
+
+# Parsed columns kept as stripped text; every other mapped column is numeric
+_TEXT_COLUMNS = frozenset({"employee_id", "period"})
+
 
 def _q(query: str) -> str:
     """Convert SQLite query to PostgreSQL if needed (? -> %s)"""
@@ -28,6 +174,11 @@ def _get_count(row) -> int:
     return row[0] if row[0] is not None else 0
 
 
+def _rows_as_dicts(cursor) -> List[Dict]:
+    """All remaining rows of an executed cursor as a list of dicts"""
+    return list(iter_rows_as_dicts(cursor))
+
+
 def _get_first_col(row):
     """Extract first column value from a row (handles dict for PostgreSQL, tuple for SQLite)"""
     if row is None:
@@ -38,41 +189,340 @@ def _get_first_col(row):
     return row[0]
 
 
-def _get_ignored_companies(cursor) -> List[str]:
-    """
-    Get list of ignored companies from settings.
-    Works with both SQLite and PostgreSQL.
-    Returns empty list if no ignored companies setting exists.
-    """
-    try:
-        cursor.execute(_q("SELECT value FROM settings WHERE key = ?"), ("ignored_companies",))
-        result = cursor.fetchone()
-        if result:
-            import json
-            value = result['value'] if isinstance(result, dict) else result[0]
-            if value:
-                return json.loads(value)
-    except Exception:
-        pass
-    return []
-
-
 def _build_company_filter(ignored_companies: List[str], column: str = "e.dispatch_company") -> tuple:
     """
     Build SQL filter clause for excluding ignored companies.
     Returns (sql_clause, params) tuple.
 
+    The list is bound as a single parameter (a PostgreSQL array / a JSON array
+    for SQLite's json_each), so the statement text is the same however many
+    companies are ignored and its prepared statement / plan is reused.
+
     If no ignored companies, returns empty clause that doesn't filter anything.
     """
     if not ignored_companies:
         return ("", tuple())
 
     if USE_POSTGRES:
-        placeholders = ", ".join(["%s"] * len(ignored_companies))
-    else:
-        placeholders = ", ".join(["?"] * len(ignored_companies))
+        return (f"AND {column} <> ALL(%s::text[])", (list(ignored_companies),))
+    return (
+        f"AND {column} NOT IN (SELECT value FROM json_each(?))",
+        (json.dumps(ignored_companies, ensure_ascii=False),),
+    )
+
+
+# Frequently executed statements, built (and placeholder-converted) once at
+# import instead of on every call
+
+# Per-employee hourly profit and margin, derived from the two stored rates.
+# Shared by list/detail reads and the RETURNING clause of employee writes.
+_EMPLOYEE_COMPUTED_COLUMNS = """
+                (billing_rate - hourly_rate) as profit_per_hour,
+                CASE WHEN billing_rate > 0
+                     THEN ((billing_rate - hourly_rate) / billing_rate * 100)
+                     ELSE 0 END as margin_rate
+"""
+
+_EMPLOYEE_SELECT = f"""
+            SELECT e.*,{_EMPLOYEE_COMPUTED_COLUMNS}            FROM employees e
+"""
+
+_PAYROLL_SELECT = """
+            SELECT p.*, e.name as employee_name, e.dispatch_company
+            FROM payroll_records p
+            LEFT JOIN employees e ON p.employee_id = e.employee_id
+"""
+
+_GET_SETTING_SQL = _q("SELECT value FROM settings WHERE key = ?")
+
+_UPSERT_SETTING_SQL = _q("""
+                INSERT INTO settings (key, value, updated_at)
+                VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(key) DO UPDATE SET
+                    value = excluded.value,
+                    updated_at = CURRENT_TIMESTAMP
+""")
+
+_UPSERT_SETTING_WITH_DESCRIPTION_SQL = _q("""
+                INSERT INTO settings (key, value, description, updated_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(key) DO UPDATE SET
+                    value = excluded.value,
+                    description = excluded.description,
+                    updated_at = CURRENT_TIMESTAMP
+""")
+
+_GET_INSURANCE_RATES_SQL = (
+    "SELECT key, value FROM settings "
+    "WHERE key IN ('employment_insurance_rate', 'workers_comp_rate')"
+)
+
+_GET_EMPLOYEE_SQL = _q(_EMPLOYEE_SELECT + "            WHERE e.employee_id = ?\n")
+
+# Just what create_payroll_record needs: rates for the cost math, name and
+# company for the returned row (no computed profit columns)
+_GET_EMPLOYEE_RATES_SQL = _q(
+    "SELECT employee_id, name, dispatch_company, hourly_rate, billing_rate "
+    "FROM employees WHERE employee_id = ?"
+)
+
+# Rates for a batch of employees; full-size chunks reuse one prepared statement
+_EMPLOYEE_ID_CHUNK = 500
+_GET_EMPLOYEES_RATES_BY_IDS_SQL = (
+    "SELECT employee_id, hourly_rate, billing_rate FROM employees "
+    "WHERE employee_id IN ({placeholders})"
+)
+_GET_EMPLOYEES_RATES_FULL_CHUNK_SQL = _q(
+    _GET_EMPLOYEES_RATES_BY_IDS_SQL.format(placeholders=", ".join(["?"] * _EMPLOYEE_ID_CHUNK))
+)
+
+_GET_PAYROLL_BY_EMPLOYEE_YEAR_SQL = _q(
+    _PAYROLL_SELECT
+    + "            WHERE p.employee_id = ? AND p.period LIKE ?\n"
+    + "            ORDER BY p.period ASC\n"
+)
+
+_GET_PERIODS_SQL = "SELECT DISTINCT period FROM payroll_records ORDER BY period DESC"
+
+
+def _build_filter_queries(select: str, filters: tuple, suffix: str) -> Dict[tuple, str]:
+    """
+    Precompile one statement per combination of optional filters.
 
-    return (f"AND {column} NOT IN ({placeholders})", tuple(ignored_companies))
+    Keys are tuples of booleans parallel to ``filters``; picking by
+    (bool(a), bool(b), ...) keeps the SQL text stable per combination so the
+    driver's statement cache is hit instead of re-preparing concatenated SQL.
+    """
+    queries = {}
+    for enabled in product((False, True), repeat=len(filters)):
+        clauses = [f for f, on in zip(filters, enabled) if on]
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        queries[enabled] = _q(select + where + suffix)
+    return queries
+
+
+# get_employees: (search, company, employee_type)
+_EMPLOYEE_QUERIES = _build_filter_queries(
+    _EMPLOYEE_SELECT,
+    (
+        "(e.employee_id LIKE ? OR e.name LIKE ? OR e.name_kana LIKE ?)",
+        "e.dispatch_company = ?",
+        "e.employee_type = ?",
+    ),
+    " ORDER BY e.employee_id",
+)
+
+# get_employees with a search on SQLite: the trigram index (search.py) picks
+# the candidate rows and the same LIKE test confirms them, so results match
+# the plain LIKE scan. Only the search=True half of the table is used.
+_EMPLOYEE_FTS_QUERIES = _build_filter_queries(
+    _EMPLOYEE_SELECT,
+    (
+        "e.id IN (SELECT rowid FROM employees_fts WHERE employees_fts MATCH ?)"
+        " AND (e.employee_id LIKE ? OR e.name LIKE ? OR e.name_kana LIKE ?)",
+        "e.dispatch_company = ?",
+        "e.employee_type = ?",
+    ),
+    " ORDER BY e.employee_id",
+)
+
+# get_payroll_records: (period, employee_id)
+_PAYROLL_QUERIES = _build_filter_queries(
+    _PAYROLL_SELECT,
+    ("p.period = ?", "p.employee_id = ?"),
+    " ORDER BY p.period DESC, p.employee_id",
+)
+
+# get_monthly_statistics: (period,)
+# LEFT JOIN (not a per-row correlated subquery) for the paid leave rate
+_MONTHLY_STATS_QUERIES = _build_filter_queries(
+    """
+            SELECT
+                p.period,
+                COUNT(DISTINCT p.employee_id) as total_employees,
+                SUM(p.billing_amount) as total_revenue,
+                SUM(p.total_company_cost) as total_cost,
+                SUM(p.gross_profit) as total_profit,
+                AVG(p.profit_margin) as average_margin,
+                SUM(p.company_social_insurance) as total_social_insurance,
+                SUM(p.paid_leave_hours * e.hourly_rate) as total_paid_leave_cost
+            FROM payroll_records p
+            LEFT JOIN employees e ON e.employee_id = p.employee_id
+    """,
+    ("p.period = ?",),
+    " GROUP BY p.period ORDER BY p.period DESC",
+)
+
+
+# Rows per network round trip for PostgreSQL export cursors (server-side)
+_EXPORT_FETCH_SIZE = 1000
+
+
+# Payroll UPSERT - compatible with both SQLite and PostgreSQL.
+# Shared by create_payroll_record and bulk_create_payroll_records.
+if USE_POSTGRES:
+    # PostgreSQL: INSERT ... ON CONFLICT DO UPDATE
+    _PAYROLL_UPSERT_SQL = """
+        INSERT INTO payroll_records (
+            employee_id, period, work_days, work_hours, overtime_hours,
+            night_hours, holiday_hours, overtime_over_60h,
+            paid_leave_hours, paid_leave_days, paid_leave_amount,
+            base_salary, overtime_pay, night_pay, holiday_pay, overtime_over_60h_pay,
+            transport_allowance, other_allowances, non_billable_allowances, gross_salary,
+            social_insurance, welfare_pension, employment_insurance, income_tax, resident_tax,
+            rent_deduction, utilities_deduction, meal_deduction, advance_payment, year_end_adjustment,
+            other_deductions, net_salary, billing_amount, company_social_insurance,
+            company_employment_insurance, company_workers_comp, total_company_cost, gross_profit, profit_margin
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ON CONFLICT (employee_id, period) DO UPDATE SET
+            work_days = EXCLUDED.work_days,
+            work_hours = EXCLUDED.work_hours,
+            overtime_hours = EXCLUDED.overtime_hours,
+            night_hours = EXCLUDED.night_hours,
+            holiday_hours = EXCLUDED.holiday_hours,
+            overtime_over_60h = EXCLUDED.overtime_over_60h,
+            paid_leave_hours = EXCLUDED.paid_leave_hours,
+            paid_leave_days = EXCLUDED.paid_leave_days,
+            paid_leave_amount = EXCLUDED.paid_leave_amount,
+            base_salary = EXCLUDED.base_salary,
+            overtime_pay = EXCLUDED.overtime_pay,
+            night_pay = EXCLUDED.night_pay,
+            holiday_pay = EXCLUDED.holiday_pay,
+            overtime_over_60h_pay = EXCLUDED.overtime_over_60h_pay,
+            transport_allowance = EXCLUDED.transport_allowance,
+            other_allowances = EXCLUDED.other_allowances,
+            non_billable_allowances = EXCLUDED.non_billable_allowances,
+            gross_salary = EXCLUDED.gross_salary,
+            social_insurance = EXCLUDED.social_insurance,
+            welfare_pension = EXCLUDED.welfare_pension,
+            employment_insurance = EXCLUDED.employment_insurance,
+            income_tax = EXCLUDED.income_tax,
+            resident_tax = EXCLUDED.resident_tax,
+            rent_deduction = EXCLUDED.rent_deduction,
+            utilities_deduction = EXCLUDED.utilities_deduction,
+            meal_deduction = EXCLUDED.meal_deduction,
+            advance_payment = EXCLUDED.advance_payment,
+            year_end_adjustment = EXCLUDED.year_end_adjustment,
+            other_deductions = EXCLUDED.other_deductions,
+            net_salary = EXCLUDED.net_salary,
+            billing_amount = EXCLUDED.billing_amount,
+            company_social_insurance = EXCLUDED.company_social_insurance,
+            company_employment_insurance = EXCLUDED.company_employment_insurance,
+            company_workers_comp = EXCLUDED.company_workers_comp,
+            total_company_cost = EXCLUDED.total_company_cost,
+            gross_profit = EXCLUDED.gross_profit,
+            profit_margin = EXCLUDED.profit_margin
+"""
+    # Multi-row form for execute_values: one statement per page instead of per row
+    _PAYROLL_UPSERT_VALUES_SQL = re.sub(r"VALUES \([%s, ]+\)", "VALUES %s", _PAYROLL_UPSERT_SQL)
+else:
+    # SQLite: INSERT OR REPLACE
+    _PAYROLL_UPSERT_SQL = """
+        INSERT OR REPLACE INTO payroll_records (
+            employee_id, period, work_days, work_hours, overtime_hours,
+            night_hours, holiday_hours, overtime_over_60h,
+            paid_leave_hours, paid_leave_days, paid_leave_amount,
+            base_salary, overtime_pay, night_pay, holiday_pay, overtime_over_60h_pay,
+            transport_allowance, other_allowances, non_billable_allowances, gross_salary,
+            social_insurance, welfare_pension, employment_insurance, income_tax, resident_tax,
+            rent_deduction, utilities_deduction, meal_deduction, advance_payment, year_end_adjustment,
+            other_deductions, net_salary, billing_amount, company_social_insurance,
+            company_employment_insurance, company_workers_comp, total_company_cost, gross_profit, profit_margin
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+# Leading (non-derived) columns of _PAYROLL_UPSERT_SQL, in order
+_PAYROLL_INPUT_FIELDS = (
+    "employee_id", "period", "work_days", "work_hours", "overtime_hours",
+    "night_hours", "holiday_hours", "overtime_over_60h",
+    "paid_leave_hours", "paid_leave_days", "paid_leave_amount",
+    "base_salary", "overtime_pay", "night_pay", "holiday_pay", "overtime_over_60h_pay",
+    "transport_allowance", "other_allowances", "non_billable_allowances", "gross_salary",
+    "social_insurance", "welfare_pension", "employment_insurance", "income_tax", "resident_tax",
+    "rent_deduction", "utilities_deduction", "meal_deduction", "advance_payment", "year_end_adjustment",
+    "other_deductions", "net_salary",
+)
+# Reads all of the above from a record in one C-level call
+_PAYROLL_INPUT_GETTER = attrgetter(*_PAYROLL_INPUT_FIELDS)
+
+# Record fields read as numeric columns by _build_payroll_values_bulk
+_BULK_COST_FIELDS = (
+    "gross_salary", "other_allowances", "transport_allowance", "billing_amount",
+    "social_insurance", "welfare_pension", "base_salary", "overtime_pay", "night_pay",
+    "holiday_pay", "overtime_over_60h_pay", "paid_leave_amount", "non_billable_allowances",
+    "company_social_insurance", "company_employment_insurance", "company_workers_comp",
+    "total_company_cost", "gross_profit",
+)
+_BILLING_FIELDS = (
+    "work_hours", "overtime_hours", "overtime_over_60h", "night_hours", "holiday_hours",
+    "other_allowances",
+)
+
+
+def _record_columns(records: List[Any], fields: tuple) -> Dict[str, "np.ndarray"]:
+    """
+    Float column per field across records, read in a single pass (requires numpy).
+
+    One attrgetter call per record replaces a getattr list comprehension per
+    field; None (an optional field that was not provided) becomes NaN.
+    """
+    getter = attrgetter(*fields)
+    matrix = np.array([getter(r) for r in records], dtype=float)
+    return dict(zip(fields, matrix.reshape(len(records), len(fields)).T))
+
+
+# Single-record upsert that hands back the stored row (no follow-up SELECT).
+# executemany cannot consume RETURNING rows, so bulk inserts keep the plain form.
+_PAYROLL_UPSERT_RETURNING_SQL = _PAYROLL_UPSERT_SQL.rstrip() + "\n        RETURNING *\n"
+
+# Written employee row plus the same computed columns as _EMPLOYEE_SELECT
+_EMPLOYEE_RETURNING = f"""
+            RETURNING *,{_EMPLOYEE_COMPUTED_COLUMNS}"""
+
+_CREATE_EMPLOYEE_SQL = _q("""
+            INSERT INTO employees (employee_id, name, name_kana, dispatch_company, department,
+                                   hourly_rate, billing_rate, status, hire_date,
+                                   employee_type, gender, birth_date, termination_date, nationality)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+""" + _EMPLOYEE_RETURNING)
+
+_UPDATE_EMPLOYEE_SQL = _q("""
+            UPDATE employees
+            SET name = ?, name_kana = ?, dispatch_company = ?, department = ?,
+                hourly_rate = ?, billing_rate = ?, status = ?, hire_date = ?,
+                employee_type = ?, gender = ?, birth_date = ?, termination_date = ?,
+                nationality = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE employee_id = ?
+""" + _EMPLOYEE_RETURNING)
+
+_DELETE_EMPLOYEE_SQL = _q("DELETE FROM employees WHERE employee_id = ?")
+
+# Master-file sync: insert new employees, overwrite existing ones (same columns
+# as update_employee). ON CONFLICT ... DO UPDATE works on SQLite and PostgreSQL.
+_UPSERT_EMPLOYEE_SQL = _q("""
+            INSERT INTO employees (employee_id, name, name_kana, dispatch_company, department,
+                                   hourly_rate, billing_rate, status, hire_date,
+                                   employee_type, gender, birth_date, termination_date, nationality)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (employee_id) DO UPDATE SET
+                name = EXCLUDED.name, name_kana = EXCLUDED.name_kana,
+                dispatch_company = EXCLUDED.dispatch_company, department = EXCLUDED.department,
+                hourly_rate = EXCLUDED.hourly_rate, billing_rate = EXCLUDED.billing_rate,
+                status = EXCLUDED.status, hire_date = EXCLUDED.hire_date,
+                employee_type = EXCLUDED.employee_type, gender = EXCLUDED.gender,
+                birth_date = EXCLUDED.birth_date, termination_date = EXCLUDED.termination_date,
+                nationality = EXCLUDED.nationality, updated_at = CURRENT_TIMESTAMP
+""")
+# Multi-row form for execute_values on PostgreSQL
+_UPSERT_EMPLOYEE_VALUES_SQL = re.sub(r"VALUES \([%s, ]+\)", "VALUES %s", _UPSERT_EMPLOYEE_SQL)
+
+# EmployeeCreate fields in _CREATE_EMPLOYEE_SQL / _UPSERT_EMPLOYEE_SQL column order
+_EMPLOYEE_INPUT_GETTER = attrgetter(
+    "employee_id", "name", "name_kana", "dispatch_company", "department",
+    "hourly_rate", "billing_rate", "status", "hire_date",
+    "employee_type", "gender", "birth_date", "termination_date", "nationality",
+)
 
 
 class PayrollService:
@@ -87,70 +537,68 @@ class PayrollService:
     # ============== Settings Operations ==============
 
     def get_setting(self, key: str, default: str = None) -> Optional[str]:
-        """Get a single setting value by key"""
-        cursor = self.db.cursor()
-        cursor.execute(_q("SELECT value FROM settings WHERE key = ?"), (key,))
-        row = cursor.fetchone()
-        return row["value"] if row else default
+        """Get a single setting value by key (cached per process)"""
+        cache_key = f"settings:{key}"
+        value = _settings_cache.get(cache_key)
+        if value is None:
+            cursor = self.db.cursor()
+            cursor.execute(_GET_SETTING_SQL, (key,))
+            row = cursor.fetchone()
+            if not row:
+                return default
+            value = row["value"]
+            _settings_cache.set(cache_key, value)
+        return value
 
     def get_all_settings(self) -> List[Dict]:
         """Get all settings"""
         cursor = self.db.cursor()
         cursor.execute("SELECT * FROM settings ORDER BY key")
-        return [dict(row) for row in cursor.fetchall()]
+        return _rows_as_dicts(cursor)
 
     def update_setting(self, key: str, value: str, description: str = None) -> bool:
         """Update or create a setting"""
         cursor = self.db.cursor()
         if description:
-            cursor.execute(
-                _q("""
-                INSERT INTO settings (key, value, description, updated_at)
-                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-                ON CONFLICT(key) DO UPDATE SET
-                    value = excluded.value,
-                    description = excluded.description,
-                    updated_at = CURRENT_TIMESTAMP
-            """),
-                (key, value, description),
-            )
+            cursor.execute(_UPSERT_SETTING_WITH_DESCRIPTION_SQL, (key, value, description))
         else:
-            cursor.execute(
-                _q("""
-                INSERT INTO settings (key, value, updated_at)
-                VALUES (?, ?, CURRENT_TIMESTAMP)
-                ON CONFLICT(key) DO UPDATE SET
-                    value = excluded.value,
-                    updated_at = CURRENT_TIMESTAMP
-            """),
-                (key, value),
-            )
+            cursor.execute(_UPSERT_SETTING_SQL, (key, value))
         self.db.commit()
+        invalidate_settings_cache()
+        invalidate_statistics_cache()
         return cursor.rowcount > 0
 
     def get_insurance_rates(self) -> Dict[str, float]:
-        """Get current insurance rates from settings"""
-        return {
-            "employment_insurance_rate": float(
-                self.get_setting("employment_insurance_rate", "0.0090")
-            ),
-            "workers_comp_rate": float(self.get_setting("workers_comp_rate", "0.003")),
-        }
+        """Get current insurance rates from settings (one query for both keys, cached)"""
+        rates = _settings_cache.get("settings:insurance_rates")
+        if rates is None:
+            cursor = self.db.cursor()
+            cursor.execute(_GET_INSURANCE_RATES_SQL)
+            values = {row["key"]: row["value"] for row in cursor.fetchall()}
+            rates = {
+                "employment_insurance_rate": float(
+                    values.get("employment_insurance_rate") or "0.0090"
+                ),
+                "workers_comp_rate": float(values.get("workers_comp_rate") or "0.003"),
+            }
+            _settings_cache.set("settings:insurance_rates", rates)
+        return dict(rates)
 
     def get_ignored_companies(self) -> List[str]:
-        """Get list of ignored/deactivated companies"""
-        import json
-
-        val = self.get_setting("ignored_companies", "[]")
-        try:
-            return json.loads(val)
-        except (json.JSONDecodeError, TypeError):
-            return []
+        """Get list of ignored/deactivated companies (decoded once per settings change)"""
+        ignored = _settings_cache.get("settings:ignored_companies:list")
+        if ignored is None:
+            val = self.get_setting("ignored_companies", "[]")
+            try:
+                ignored = json.loads(val)
+            except (json.JSONDecodeError, TypeError):
+                ignored = []
+            _settings_cache.set("settings:ignored_companies:list", ignored)
+        # Callers (set_company_active) may modify the list they get back
+        return list(ignored)
 
     def set_company_active(self, company_name: str, active: bool) -> bool:
         """Set company active/inactive status"""
-        import json
-
         ignored = self.get_ignored_companies()
 
         if active:
@@ -174,86 +622,80 @@ class PayrollService:
     ) -> List[Dict]:
         """Get all employees with optional filtering by search, company, and employee_type"""
         cursor = self.db.cursor()
+        self._execute_employees(cursor, search, company, employee_type)
+        return _rows_as_dicts(cursor)
 
-        # Use placeholder based on database type
-        ph = "%s" if USE_POSTGRES else "?"
+    def iter_employees(
+        self,
+        search: Optional[str] = None,
+        company: Optional[str] = None,
+        employee_type: Optional[str] = None,
+    ) -> Iterator[Dict]:
+        """Same as get_employees, but yields rows as they are read off the cursor (for exports)"""
+        cursor = self._export_cursor()
+        self._execute_employees(cursor, search, company, employee_type)
+        yield from iter_rows_as_dicts(cursor)
 
-        query = """
-            SELECT e.*,
-                   (e.billing_rate - e.hourly_rate) as profit_per_hour,
-                   CASE WHEN e.billing_rate > 0
-                        THEN ((e.billing_rate - e.hourly_rate) / e.billing_rate * 100)
-                        ELSE 0 END as margin_rate
-            FROM employees e
-            WHERE 1=1
-        """
+    def _execute_employees(
+        self,
+        cursor,
+        search: Optional[str],
+        company: Optional[str],
+        employee_type: Optional[str],
+    ) -> None:
+        """Run the filtered employee listing on the given cursor"""
         params = []
-
         if search:
-            query += f" AND (e.employee_id LIKE {ph} OR e.name LIKE {ph} OR e.name_kana LIKE {ph})"
             search_param = f"%{search}%"
             params.extend([search_param, search_param, search_param])
-
         if company:
-            query += f" AND e.dispatch_company = {ph}"
             params.append(company)
-
         if employee_type:
-            query += f" AND e.employee_type = {ph}"
             params.append(employee_type)
 
-        query += " ORDER BY e.employee_id"
+        key = (bool(search), bool(company), bool(employee_type))
+        # Trigram MATCH needs 3+ characters, and LIKE wildcards in the search
+        # text have no FTS equivalent
+        if search and not USE_POSTGRES and len(search) >= 3 and not _LIKE_WILDCARDS & set(search):
+            phrase = '"' + search.replace('"', '""') + '"'
+            try:
+                cursor.execute(_EMPLOYEE_FTS_QUERIES[key], [phrase] + params)
+            except sqlite3.OperationalError:
+                # FTS5/trigram unavailable - fall back to the LIKE scan
+                cursor.execute(_EMPLOYEE_QUERIES[key], params)
+        else:
+            cursor.execute(_EMPLOYEE_QUERIES[key], params)
 
-        cursor.execute(query, params)
-        return [dict(row) for row in cursor.fetchall()]
+    def _export_cursor(self):
+        """
+        Cursor for the iter_* listings (exports only; get_* use a plain cursor).
+
+        On PostgreSQL a plain psycopg2 cursor downloads the whole result at
+        execute(); a named (server-side) cursor fetches _EXPORT_FETCH_SIZE rows
+        per round trip instead, so exports start streaming right away and
+        memory stays bounded. SQLite cursors already step row by row.
+        """
+        if USE_POSTGRES:
+            cursor = self.db.cursor(name=f"export_{uuid.uuid4().hex}")
+            cursor.itersize = _EXPORT_FETCH_SIZE
+            return cursor
+        return self.db.cursor()
 
     def get_employee(self, employee_id: str) -> Optional[Dict]:
         """Get a single employee by ID"""
         cursor = self.db.cursor()
-        cursor.execute(
-            _q("""
-            SELECT e.*,
-                   (e.billing_rate - e.hourly_rate) as profit_per_hour,
-                   CASE WHEN e.billing_rate > 0
-                        THEN ((e.billing_rate - e.hourly_rate) / e.billing_rate * 100)
-                        ELSE 0 END as margin_rate
-            FROM employees e
-            WHERE e.employee_id = ?
-        """),
-            (employee_id,),
-        )
+        cursor.execute(_GET_EMPLOYEE_SQL, (employee_id,))
         row = cursor.fetchone()
         return dict(row) if row else None
 
     def create_employee(self, employee: EmployeeCreate) -> Dict:
         """Create a new employee"""
         cursor = self.db.cursor()
-        cursor.execute(
-            _q("""
-            INSERT INTO employees (employee_id, name, name_kana, dispatch_company, department,
-                                   hourly_rate, billing_rate, status, hire_date,
-                                   employee_type, gender, birth_date, termination_date, nationality)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """),
-            (
-                employee.employee_id,
-                employee.name,
-                employee.name_kana,
-                employee.dispatch_company,
-                employee.department,
-                employee.hourly_rate,
-                employee.billing_rate,
-                employee.status,
-                employee.hire_date,
-                getattr(employee, "employee_type", "haken"),
-                getattr(employee, "gender", None),
-                getattr(employee, "birth_date", None),
-                getattr(employee, "termination_date", None),
-                getattr(employee, "nationality", None),
-            ),
-        )
+        cursor.execute(_CREATE_EMPLOYEE_SQL, _EMPLOYEE_INPUT_GETTER(employee))
+        row = cursor.fetchone()
         self.db.commit()
-        return self.get_employee(employee.employee_id)
+        invalidate_statistics_cache()
+        return dict(row)
 
     def update_employee(
         self, employee_id: str, employee: EmployeeCreate
@@ -261,14 +703,7 @@ class PayrollService:
         """Update an existing employee"""
         cursor = self.db.cursor()
         cursor.execute(
-            _q("""
-            UPDATE employees
-            SET name = ?, name_kana = ?, dispatch_company = ?, department = ?,
-                hourly_rate = ?, billing_rate = ?, status = ?, hire_date = ?,
-                employee_type = ?, gender = ?, birth_date = ?, termination_date = ?,
-                nationality = ?, updated_at = CURRENT_TIMESTAMP
-            WHERE employee_id = ?
-        """),
+            _UPDATE_EMPLOYEE_SQL,
             (
                 employee.name,
                 employee.name_kana,
@@ -278,22 +713,62 @@ class PayrollService:
                 employee.billing_rate,
                 employee.status,
                 employee.hire_date,
-                getattr(employee, "employee_type", "haken"),
-                getattr(employee, "gender", None),
-                getattr(employee, "birth_date", None),
-                getattr(employee, "termination_date", None),
-                getattr(employee, "nationality", None),
+                employee.employee_type,
+                employee.gender,
+                employee.birth_date,
+                employee.termination_date,
+                employee.nationality,
                 employee_id,
             ),
         )
+        row = cursor.fetchone()
+        self.db.commit()
+        invalidate_statistics_cache()
+        return dict(row) if row else None
+
+    def bulk_upsert_employees(self, employees: List[EmployeeCreate]) -> Dict:
+        """
+        Create or update many employees (master-file sync) in one batch.
+
+        Existing IDs are looked up in one pass and every row is written with a
+        single executemany / execute_values upsert, then committed once, instead
+        of a read and a write (and commit) per employee.
+        Counts match a create-or-update loop: an ID already in the table, or
+        seen earlier in the batch, counts as updated.
+
+        Returns:
+            {"created": int, "updated": int}
+        """
+        if not employees:
+            return {"created": 0, "updated": 0}
+
+        seen = set(self._get_employees_by_ids({e.employee_id for e in employees}))
+        created = 0
+        for employee in employees:
+            if employee.employee_id not in seen:
+                created += 1
+                seen.add(employee.employee_id)
+
+        rows = [_EMPLOYEE_INPUT_GETTER(employee) for employee in employees]
+        cursor = self.db.cursor()
+        if USE_POSTGRES:
+            # ON CONFLICT cannot touch the same row twice in one statement;
+            # the last entry per employee_id wins, as in a row-by-row loop
+            unique_rows = list({row[0]: row for row in rows}.values())
+            execute_values(cursor, _UPSERT_EMPLOYEE_VALUES_SQL, unique_rows, page_size=1000)
+        else:
+            cursor.executemany(_UPSERT_EMPLOYEE_SQL, rows)
         self.db.commit()
-        return self.get_employee(employee_id) if cursor.rowcount > 0 else None
+        invalidate_statistics_cache()
+
+        return {"created": created, "updated": len(employees) - created}
 
     def delete_employee(self, employee_id: str) -> bool:
         """Delete an employee"""
         cursor = self.db.cursor()
-        cursor.execute(_q("DELETE FROM employees WHERE employee_id = ?"), (employee_id,))
+        cursor.execute(_DELETE_EMPLOYEE_SQL, (employee_id,))
         self.db.commit()
+        invalidate_statistics_cache()
         return cursor.rowcount > 0
 
     # ============== Payroll Operations ==============
@@ -303,39 +778,34 @@ class PayrollService:
     ) -> List[Dict]:
         """Get payroll records with optional filtering"""
         cursor = self.db.cursor()
+        self._execute_payroll_records(cursor, period, employee_id)
+        return _rows_as_dicts(cursor)
 
-        # Use placeholder based on database type
-        ph = "%s" if USE_POSTGRES else "?"
-
-        query = """
-            SELECT p.*, e.name as employee_name, e.dispatch_company
-            FROM payroll_records p
-            LEFT JOIN employees e ON p.employee_id = e.employee_id
-            WHERE 1=1
-        """
+    def iter_payroll_records(
+        self, period: Optional[str] = None, employee_id: Optional[str] = None
+    ) -> Iterator[Dict]:
+        """Same as get_payroll_records, but yields rows as they are read off the cursor (for exports)"""
+        cursor = self._export_cursor()
+        self._execute_payroll_records(cursor, period, employee_id)
+        yield from iter_rows_as_dicts(cursor)
+
+    def _execute_payroll_records(
+        self, cursor, period: Optional[str], employee_id: Optional[str]
+    ) -> None:
+        """Run the filtered payroll listing on the given cursor"""
         params = []
-
         if period:
-            query += f" AND p.period = {ph}"
             params.append(period)
-
         if employee_id:
-            query += f" AND p.employee_id = {ph}"
             params.append(employee_id)
 
-        query += " ORDER BY p.period DESC, p.employee_id"
-
+        query = _PAYROLL_QUERIES[(bool(period), bool(employee_id))]
         cursor.execute(query, params)
-        return [dict(row) for row in cursor.fetchall()]
 
     def get_available_periods(self) -> List[str]:
         """Get list of available periods"""
         cursor = self.db.cursor()
-        cursor.execute(
-            """
-            SELECT DISTINCT period FROM payroll_records ORDER BY period DESC
-        """
-        )
+        cursor.execute(_GET_PERIODS_SQL)
         return [row["period"] for row in cursor.fetchall()]
 
     def get_payroll_by_employee_year(
@@ -347,17 +817,8 @@ class PayrollService:
         # Filter periods that match the year (e.g., "2025年1月", "2025年2月", etc.)
         year_pattern = f"{year}年%"
 
-        cursor.execute(
-            _q("""
-            SELECT p.*, e.name as employee_name, e.dispatch_company
-            FROM payroll_records p
-            LEFT JOIN employees e ON p.employee_id = e.employee_id
-            WHERE p.employee_id = ? AND p.period LIKE ?
-            ORDER BY p.period ASC
-        """),
-            (employee_id, year_pattern),
-        )
-        return [dict(row) for row in cursor.fetchall()]
+        cursor.execute(_GET_PAYROLL_BY_EMPLOYEE_YEAR_SQL, (employee_id, year_pattern))
+        return _rows_as_dicts(cursor)
 
     # Insurance rates (2025年度) - configurable constants
     EMPLOYMENT_INSURANCE_RATE = 0.0090  # 雇用保険（会社負担）0.90% ← 2025年度
@@ -374,7 +835,7 @@ class PayrollService:
 
     def calculate_billing_amount(
         self, record: PayrollRecordCreate, employee: Dict
-    ) -> float:
+    ) -> int:
         """
         Calculate billing amount based on hours and employee's 単価 (billing_rate)
 
@@ -390,18 +851,22 @@ class PayrollService:
             employee: Employee dict with billing_rate
 
         Returns:
-            Calculated billing amount
+            Calculated billing amount in whole yen
         """
         tanka = employee.get("billing_rate", 0)
         if tanka <= 0:
-            return 0.0
+            return 0
+
+        # Get hours from record (model fields default to 0)
+        work_hours = record.work_hours
+        overtime_hours = record.overtime_hours
+        overtime_over_60h = record.overtime_over_60h
+        night_hours = record.night_hours
+        holiday_hours = record.holiday_hours
 
-        # Get hours from record
-        work_hours = getattr(record, "work_hours", 0) or 0
-        overtime_hours = getattr(record, "overtime_hours", 0) or 0
-        overtime_over_60h = getattr(record, "overtime_over_60h", 0) or 0
-        night_hours = getattr(record, "night_hours", 0) or 0
-        holiday_hours = getattr(record, "holiday_hours", 0) or 0
+        # No hours worked (leave-only or terminated months): only allowances are billed
+        if not (work_hours or overtime_hours or overtime_over_60h or night_hours or holiday_hours):
+            return round(record.other_allowances)
 
         # Calculate billing components
         # 基本時間 (normal hours)
@@ -425,7 +890,7 @@ class PayrollService:
 
         # Other Allowances (皆勤手当, 深夜残業, etc.) are passed through to billing
         # EXCLUDING: Transport and Non-Billable (業務手当) which are in separate fields
-        other_allowances_billing = getattr(record, "other_allowances", 0) or 0
+        other_allowances_billing = record.other_allowances
 
         total_billing = (
             base_billing
@@ -438,25 +903,39 @@ class PayrollService:
 
         return round(total_billing)
 
-    def create_payroll_record(self, record: PayrollRecordCreate) -> Dict:
-        """Create a new payroll record with calculated fields"""
-        # Get employee info for calculations
-        employee = self.get_employee(record.employee_id)
-        if not employee:
-            raise ValueError(f"Employee {record.employee_id} not found")
+    def calculate_billing_amounts_vec(
+        self, records: List[PayrollRecordCreate], billing_rates
+    ) -> "np.ndarray":
+        """
+        calculate_billing_amount for many records at once (requires numpy).
 
-        hourly_rate = employee["hourly_rate"]
-        billing_rate = employee["billing_rate"]
+        billing_rates is the 単価 per record, in the same order. Terms are
+        evaluated in the same order as the scalar version so results match
+        it exactly; records with 単価 <= 0 bill 0. Amounts are whole yen (int64).
+        """
+        col = _record_columns(records, _BILLING_FIELDS).__getitem__
+        tanka = np.asarray(billing_rates, dtype=float)
 
-        # Get new hour fields with defaults
-        night_hours = getattr(record, "night_hours", 0) or 0
-        holiday_hours = getattr(record, "holiday_hours", 0) or 0
-        overtime_over_60h = getattr(record, "overtime_over_60h", 0) or 0
+        total_billing = (
+            col("work_hours") * tanka
+            + col("overtime_hours") * tanka * self.BILLING_MULTIPLIERS["overtime_normal"]
+            + col("overtime_over_60h") * tanka * self.BILLING_MULTIPLIERS["overtime_over_60h"]
+            + col("night_hours") * tanka * self.BILLING_MULTIPLIERS["night"]
+            + col("holiday_hours") * tanka * self.BILLING_MULTIPLIERS["holiday"]
+            + col("other_allowances")
+        )
+        # rint rounds half to even, like round() in the scalar version
+        return np.where(tanka > 0, np.rint(total_billing), 0).astype(np.int64)
 
-        # Get new pay fields with defaults
-        night_pay = getattr(record, "night_pay", 0) or 0
-        holiday_pay = getattr(record, "holiday_pay", 0) or 0
-        overtime_over_60h_pay = getattr(record, "overtime_over_60h_pay", 0) or 0
+    def _build_payroll_values(
+        self, record: PayrollRecordCreate, employee: Dict, rates: Dict[str, float]
+    ) -> tuple:
+        """
+        Compute derived cost/profit fields for a record and return the
+        parameter tuple for _PAYROLL_UPSERT_SQL.
+        """
+        hourly_rate = employee["hourly_rate"]
+        billing_rate = employee["billing_rate"]
 
         # Calculate billing_amount if not provided or is 0
         billing_amount = record.billing_amount
@@ -464,14 +943,12 @@ class PayrollService:
             billing_amount = self.calculate_billing_amount(record, employee)
 
         # Calculate company costs
-        # Get insurance rates from settings (dynamic)
-        rates = self.get_insurance_rates()
+        # Insurance rates come from settings (dynamic), fetched by the caller
 
         # 社会保険（会社負担）= 本人負担と同額 (労使折半)
         # NOTE: 社会保険 = 健康保険 + 厚生年金 (both employer and employee pay equal amounts)
-        welfare_pension = getattr(record, "welfare_pension", 0) or 0
         company_social_insurance = record.company_social_insurance or (
-            record.social_insurance + welfare_pension
+            record.social_insurance + record.welfare_pension
         )
 
         # 雇用保険（会社負担）- Rate from settings (2025年度: 0.90%)
@@ -480,7 +957,7 @@ class PayrollService:
         )
 
         # 労災保険（会社負担100%）- Rate from settings (製造業: 0.3%)
-        company_workers_comp = getattr(record, "company_workers_comp", None) or round(
+        company_workers_comp = record.company_workers_comp or round(
             record.gross_salary * rates["workers_comp_rate"]
         )
 
@@ -498,34 +975,22 @@ class PayrollService:
         #
         # Where 法定福利費(会社負担) = 健康保険(会社) + 厚生年金(会社) + 雇用保険 + 労災保険
         # ================================================================
-        paid_leave_amount = getattr(record, "paid_leave_amount", 0) or 0
 
         # NOTE: paid_leave_amount is already in gross_salary - DO NOT add again
         # NOTE: Smart check for Transport Allowance exclusion
         # In some Excel formats, Transport Allowance (14,002) is NOT included in Gross Pay (325,587),
         # even though the UI might say so. We need to check if we need to add it to Company Cost.
 
-        # Calculate sum of known components
-        base_salary = getattr(record, "base_salary", 0) or 0
-        overtime_pay = getattr(record, "overtime_pay", 0) or 0
-        night_pay = getattr(record, "night_pay", 0) or 0
-        holiday_pay = getattr(record, "holiday_pay", 0) or 0
-        overtime_over_60h_pay = getattr(record, "overtime_over_60h_pay", 0) or 0
-        paid_leave_amount = getattr(record, "paid_leave_amount", 0) or 0
-        other_allowances = getattr(record, "other_allowances", 0) or 0
-        transport_allowance = getattr(record, "transport_allowance", 0) or 0
-        non_billable_allowances = getattr(record, "non_billable_allowances", 0) or 0
-
-        # Sum WITHOUT Transport
+        # Sum of known components WITHOUT Transport
         sum_without_transport = (
-            base_salary
-            + overtime_pay
-            + night_pay
-            + holiday_pay
-            + overtime_over_60h_pay
-            + paid_leave_amount
-            + other_allowances
-            + non_billable_allowances
+            record.base_salary
+            + record.overtime_pay
+            + record.night_pay
+            + record.holiday_pay
+            + record.overtime_over_60h_pay
+            + record.paid_leave_amount
+            + record.other_allowances
+            + record.non_billable_allowances
         )
 
         # Check if Gross matches Sum WITHOUT Transport (tolerance for rounding)
@@ -533,6 +998,7 @@ class PayrollService:
         # We must ADD it to Company Cost.
         is_transport_excluded = abs(record.gross_salary - sum_without_transport) <= 100
 
+        transport_allowance = record.transport_allowance
         transport_cost_adder = (
             transport_allowance
             if (is_transport_excluded and transport_allowance > 0)
@@ -553,45 +1019,8 @@ class PayrollService:
             round((gross_profit / billing_amount * 100), 1) if billing_amount > 0 else 0
         )
 
-        cursor = self.db.cursor()
-
-        # Get non_billable_allowances from record
-        non_billable_allowances = getattr(record, "non_billable_allowances", 0) or 0
-
-        # Build the values tuple for the INSERT
-        values = (
-            record.employee_id,
-            record.period,
-            record.work_days,
-            record.work_hours,
-            record.overtime_hours,
-            night_hours,
-            holiday_hours,
-            overtime_over_60h,
-            record.paid_leave_hours,
-            record.paid_leave_days,
-            paid_leave_amount,
-            record.base_salary,
-            record.overtime_pay,
-            night_pay,
-            holiday_pay,
-            overtime_over_60h_pay,
-            record.transport_allowance,
-            record.other_allowances,
-            non_billable_allowances,
-            record.gross_salary,
-            record.social_insurance,
-            welfare_pension,
-            record.employment_insurance,
-            record.income_tax,
-            record.resident_tax,
-            record.rent_deduction,
-            record.utilities_deduction,
-            record.meal_deduction,
-            record.advance_payment,
-            record.year_end_adjustment,
-            record.other_deductions,
-            record.net_salary,
+        # Build the values tuple for the INSERT: input columns in one C-level read
+        return _PAYROLL_INPUT_GETTER(record) + (
             billing_amount,
             company_social_insurance,
             company_employment_insurance,
@@ -601,101 +1030,117 @@ class PayrollService:
             profit_margin,
         )
 
-        # Use UPSERT pattern - compatible with both SQLite and PostgreSQL
-        if USE_POSTGRES:
-            # PostgreSQL: INSERT ... ON CONFLICT DO UPDATE
-            cursor.execute(
-                """
-                INSERT INTO payroll_records (
-                    employee_id, period, work_days, work_hours, overtime_hours,
-                    night_hours, holiday_hours, overtime_over_60h,
-                    paid_leave_hours, paid_leave_days, paid_leave_amount,
-                    base_salary, overtime_pay, night_pay, holiday_pay, overtime_over_60h_pay,
-                    transport_allowance, other_allowances, non_billable_allowances, gross_salary,
-                    social_insurance, welfare_pension, employment_insurance, income_tax, resident_tax,
-                    rent_deduction, utilities_deduction, meal_deduction, advance_payment, year_end_adjustment,
-                    other_deductions, net_salary, billing_amount, company_social_insurance,
-                    company_employment_insurance, company_workers_comp, total_company_cost, gross_profit, profit_margin
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (employee_id, period) DO UPDATE SET
-                    work_days = EXCLUDED.work_days,
-                    work_hours = EXCLUDED.work_hours,
-                    overtime_hours = EXCLUDED.overtime_hours,
-                    night_hours = EXCLUDED.night_hours,
-                    holiday_hours = EXCLUDED.holiday_hours,
-                    overtime_over_60h = EXCLUDED.overtime_over_60h,
-                    paid_leave_hours = EXCLUDED.paid_leave_hours,
-                    paid_leave_days = EXCLUDED.paid_leave_days,
-                    paid_leave_amount = EXCLUDED.paid_leave_amount,
-                    base_salary = EXCLUDED.base_salary,
-                    overtime_pay = EXCLUDED.overtime_pay,
-                    night_pay = EXCLUDED.night_pay,
-                    holiday_pay = EXCLUDED.holiday_pay,
-                    overtime_over_60h_pay = EXCLUDED.overtime_over_60h_pay,
-                    transport_allowance = EXCLUDED.transport_allowance,
-                    other_allowances = EXCLUDED.other_allowances,
-                    non_billable_allowances = EXCLUDED.non_billable_allowances,
-                    gross_salary = EXCLUDED.gross_salary,
-                    social_insurance = EXCLUDED.social_insurance,
-                    welfare_pension = EXCLUDED.welfare_pension,
-                    employment_insurance = EXCLUDED.employment_insurance,
-                    income_tax = EXCLUDED.income_tax,
-                    resident_tax = EXCLUDED.resident_tax,
-                    rent_deduction = EXCLUDED.rent_deduction,
-                    utilities_deduction = EXCLUDED.utilities_deduction,
-                    meal_deduction = EXCLUDED.meal_deduction,
-                    advance_payment = EXCLUDED.advance_payment,
-                    year_end_adjustment = EXCLUDED.year_end_adjustment,
-                    other_deductions = EXCLUDED.other_deductions,
-                    net_salary = EXCLUDED.net_salary,
-                    billing_amount = EXCLUDED.billing_amount,
-                    company_social_insurance = EXCLUDED.company_social_insurance,
-                    company_employment_insurance = EXCLUDED.company_employment_insurance,
-                    company_workers_comp = EXCLUDED.company_workers_comp,
-                    total_company_cost = EXCLUDED.total_company_cost,
-                    gross_profit = EXCLUDED.gross_profit,
-                    profit_margin = EXCLUDED.profit_margin
-            """,
-                values,
-            )
-        else:
-            # SQLite: INSERT OR REPLACE
-            cursor.execute(
-                """
-                INSERT OR REPLACE INTO payroll_records (
-                    employee_id, period, work_days, work_hours, overtime_hours,
-                    night_hours, holiday_hours, overtime_over_60h,
-                    paid_leave_hours, paid_leave_days, paid_leave_amount,
-                    base_salary, overtime_pay, night_pay, holiday_pay, overtime_over_60h_pay,
-                    transport_allowance, other_allowances, non_billable_allowances, gross_salary,
-                    social_insurance, welfare_pension, employment_insurance, income_tax, resident_tax,
-                    rent_deduction, utilities_deduction, meal_deduction, advance_payment, year_end_adjustment,
-                    other_deductions, net_salary, billing_amount, company_social_insurance,
-                    company_employment_insurance, company_workers_comp, total_company_cost, gross_profit, profit_margin
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-                values,
-            )
+    def _build_payroll_values_bulk(
+        self, pairs: List[tuple], rates: Dict[str, float]
+    ) -> List[tuple]:
+        """
+        Vectorized _build_payroll_values for many (record, employee) pairs.
 
-        # NOTE: Commit is handled by the calling endpoint to allow transactions
-        # self.db.commit()  # Removed - caller must commit
+        Same formulas as the per-record version, evaluated column-wise with
+        numpy; the final 1-decimal margin rounding stays in Python so results
+        match round() exactly.
+        """
+        records = [record for record, _ in pairs]
+        columns = _record_columns(records, _BULK_COST_FIELDS)
+        col = columns.__getitem__
+        # Optional calculated fields: a provided (truthy) value wins, as with `or`;
+        # None was read as NaN
+        def given(field):
+            return np.nan_to_num(columns[field], nan=0.0)
+
+        tanka = np.array([employee["billing_rate"] for _, employee in pairs], dtype=float)
+        gross = col("gross_salary")
+        other_allowances = col("other_allowances")
+        transport = col("transport_allowance")
+
+        # billing_amount (calculate_billing_amount when not provided)
+        calculated_billing = self.calculate_billing_amounts_vec(records, tanka)
+        billing = col("billing_amount")
+        billing = np.where((billing <= 0) & (tanka > 0), calculated_billing, billing)
+
+        # Company-side insurance
+        social = given("company_social_insurance")
+        social = np.where(social != 0, social, col("social_insurance") + col("welfare_pension"))
+        employment = given("company_employment_insurance")
+        employment = np.where(
+            employment != 0, employment, np.round(gross * rates["employment_insurance_rate"])
+        )
+        workers_comp = given("company_workers_comp")
+        workers_comp = np.where(
+            workers_comp != 0, workers_comp, np.round(gross * rates["workers_comp_rate"])
+        )
 
-        # Return the created record as a dictionary
-        cursor.execute(
-            _q("""
-            SELECT p.*, e.name as employee_name, e.dispatch_company
-            FROM payroll_records p
-            LEFT JOIN employees e ON p.employee_id = e.employee_id
-            WHERE p.employee_id = ? AND p.period = ?
-        """),
-            (record.employee_id, record.period),
+        # Transport is added to cost only when gross does not already include it
+        sum_without_transport = (
+            col("base_salary")
+            + col("overtime_pay")
+            + col("night_pay")
+            + col("holiday_pay")
+            + col("overtime_over_60h_pay")
+            + col("paid_leave_amount")
+            + other_allowances
+            + col("non_billable_allowances")
         )
+        transport_excluded = (np.abs(gross - sum_without_transport) <= 100) & (transport > 0)
+        transport_cost_adder = np.where(transport_excluded, transport, 0)
+
+        total_cost = given("total_company_cost")
+        total_cost = np.where(
+            total_cost != 0,
+            total_cost,
+            np.round(gross + social + employment + workers_comp + transport_cost_adder),
+        )
+        gross_profit = given("gross_profit")
+        gross_profit = np.where(gross_profit != 0, gross_profit, np.round(billing - total_cost))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            raw_margin = gross_profit / billing * 100
+        margins = [
+            r.profit_margin or (round(m, 1) if b > 0 else 0)
+            for r, m, b in zip(records, raw_margin.tolist(), billing.tolist())
+        ]
 
+        derived = zip(
+            billing.tolist(),
+            social.tolist(),
+            employment.tolist(),
+            workers_comp.tolist(),
+            total_cost.tolist(),
+            gross_profit.tolist(),
+            margins,
+        )
+        return [
+            _PAYROLL_INPUT_GETTER(r) + values
+            for r, values in zip(records, derived)
+        ]
+
+    def create_payroll_record(self, record: PayrollRecordCreate) -> Dict:
+        """Create a new payroll record with calculated fields"""
+        cursor = self.db.cursor()
+
+        # Get employee info for calculations
+        cursor.execute(_GET_EMPLOYEE_RATES_SQL, (record.employee_id,))
+        employee = cursor.fetchone()
+        if not employee:
+            raise ValueError(f"Employee {record.employee_id} not found")
+        employee = dict(employee)
+
+        values = self._build_payroll_values(record, employee, self.get_insurance_rates())
+
+        cursor.execute(_PAYROLL_UPSERT_RETURNING_SQL, values)
         row = cursor.fetchone()
+        _count_payroll_changes(1)
+
+        # NOTE: Commit is handled by the calling endpoint to allow transactions.
+        # The caller also calls invalidate_statistics_cache() after committing,
+        # so a concurrent read cannot re-cache the pre-commit statistics
 
-        # Helper function to convert Row to dict safely
+        # Return the created record as a dictionary
         if row:
             result = dict(row)
+            # Same shape as get_payroll_records rows, filled from the employee we already have
+            result["employee_name"] = employee.get("name")
+            result["dispatch_company"] = employee.get("dispatch_company")
             # Ensure we return floats for numeric values to match test expectations
             numeric_fields = [
                 "company_social_insurance",
@@ -710,62 +1155,193 @@ class PayrollService:
 
         return {}
 
-    # ============== Statistics ==============
+    def bulk_create_payroll_records(self, records: List[PayrollRecordCreate]) -> Dict:
+        """
+        Create many payroll records with one executemany.
 
-    def get_statistics(self, period: Optional[str] = None) -> Dict:
-        """Get dashboard statistics"""
+        Employees and insurance rates are fetched once for the whole batch.
+        Records whose employee does not exist are skipped and counted as errors.
+        If the batch write fails, it is rolled back to a savepoint and retried
+        row by row, so a bad record is counted as an error and the rest are kept.
+        Like create_payroll_record, the caller owns the transaction and commit,
+        and calls invalidate_statistics_cache() once it has committed. Import
+        endpoints then call analyze() once, after their final commit.
+
+        Returns:
+            {"saved": int, "errors": int}
+        """
+        employees = self._get_employees_by_ids({r.employee_id for r in records})
+        rates = self.get_insurance_rates()
+
+        pairs = []
+        errors = 0
+        for record in records:
+            employee = employees.get(record.employee_id)
+            if not employee:
+                errors += 1
+                continue
+            pairs.append((record, employee))
+
+        rows = None
+        if NUMPY_AVAILABLE and len(pairs) > NUMPY_BULK_THRESHOLD:
+            try:
+                rows = self._build_payroll_values_bulk(pairs, rates)
+            except (ValueError, TypeError):
+                # A bad value somewhere in the batch; find it record by record
+                rows = None
+        if rows is None:
+            rows = []
+            for record, employee in pairs:
+                try:
+                    rows.append(self._build_payroll_values(record, employee, rates))
+                except (ValueError, TypeError):
+                    errors += 1
+
+        saved = self._upsert_payroll_rows(rows) if rows else 0
+        _count_payroll_changes(saved)
+
+        return {"saved": saved, "errors": errors + len(rows) - saved}
+
+    def _upsert_payroll_rows(self, rows: List[tuple]) -> int:
+        """
+        Write payroll rows in one statement, or row by row if that fails.
+
+        Returns:
+            Number of rows saved
+        """
         cursor = self.db.cursor()
+        if not USE_POSTGRES and not self.db.in_transaction:
+            # Releasing an outermost SQLite savepoint would commit for the caller
+            cursor.execute("BEGIN")
+        cursor.execute("SAVEPOINT payroll_bulk")
+        try:
+            if USE_POSTGRES:
+                # ON CONFLICT cannot touch the same row twice in one statement;
+                # keep the last record per (employee_id, period), as the
+                # row-by-row upsert would
+                unique_rows = list({row[:2]: row for row in rows}.values())
+                execute_values(cursor, _PAYROLL_UPSERT_VALUES_SQL, unique_rows, page_size=1000)
+            else:
+                cursor.executemany(_PAYROLL_UPSERT_SQL, rows)
+            saved = len(rows)
+        except _DB_ERROR:
+            cursor.execute("ROLLBACK TO SAVEPOINT payroll_bulk")
+            saved = 0
+            for row in rows:
+                cursor.execute("SAVEPOINT payroll_row")
+                try:
+                    cursor.execute(_PAYROLL_UPSERT_SQL, row)
+                    saved += 1
+                except _DB_ERROR:
+                    cursor.execute("ROLLBACK TO SAVEPOINT payroll_row")
+                cursor.execute("RELEASE SAVEPOINT payroll_row")
+        cursor.execute("RELEASE SAVEPOINT payroll_bulk")
+        return saved
+
+    def analyze(self, force: bool = False) -> bool:
+        """
+        Refresh planner statistics for payroll_records and employees.
 
-        # Get ignored companies list (works with both SQLite and PostgreSQL)
-        ignored_companies = _get_ignored_companies(cursor)
-        company_filter, company_params = _build_company_filter(ignored_companies)
+        Unless forced, ANALYZE only runs once the payroll rows written since
+        the last run reach ANALYZE_CHANGE_RATIO of the table. Call it after
+        the import has committed; it commits the ANALYZE itself.
 
-        # Get latest period if not specified
-        if not period:
-            cursor.execute("SELECT MAX(period) FROM payroll_records")
-            result = cursor.fetchone()
-            period = _get_first_col(result)
+        Returns:
+            True if ANALYZE ran
+        """
+        global _payroll_rows_changed
+        with _payroll_changes_lock:
+            changed = _payroll_rows_changed
 
-        if not period:
-            return self._empty_statistics()
+        cursor = self.db.cursor()
+        if not force:
+            cursor.execute("SELECT COUNT(*) as count FROM payroll_records")
+            if changed == 0 or changed < _get_count(cursor.fetchone()) * ANALYZE_CHANGE_RATIO:
+                return False
 
-        # Basic counts
-        cursor.execute("SELECT COUNT(*) FROM employees")
-        total_employees = _get_count(cursor.fetchone())
+        cursor.execute("ANALYZE payroll_records")
+        cursor.execute("ANALYZE employees")
+        self.db.commit()
 
-        cursor.execute("SELECT COUNT(*) FROM employees WHERE status = 'active'")
-        active_employees = _get_count(cursor.fetchone())
+        with _payroll_changes_lock:
+            # Rows written by other requests while ANALYZE ran still count
+            _payroll_rows_changed = max(0, _payroll_rows_changed - changed)
+        return True
 
-        # Count companies (excluding ignored)
-        if ignored_companies:
-            company_filter_direct, company_params_direct = _build_company_filter(
-                ignored_companies, "dispatch_company"
-            )
-            cursor.execute(
-                _q(f"SELECT COUNT(DISTINCT dispatch_company) FROM employees WHERE 1=1 {company_filter_direct}"),
-                company_params_direct
-            )
-        else:
-            cursor.execute("SELECT COUNT(DISTINCT dispatch_company) FROM employees")
-        total_companies = _get_count(cursor.fetchone())
+    def _get_employees_by_ids(self, employee_ids) -> Dict[str, Dict]:
+        """Fetch employees (rates only) for many IDs, keyed by employee_id"""
+        ids = list(employee_ids)
+        result = {}
+        cursor = self.db.cursor()
+        # Chunk to stay well under SQLite's bound-parameter limit
+        for i in range(0, len(ids), _EMPLOYEE_ID_CHUNK):
+            chunk = ids[i:i + _EMPLOYEE_ID_CHUNK]
+            if len(chunk) == _EMPLOYEE_ID_CHUNK:
+                query = _GET_EMPLOYEES_RATES_FULL_CHUNK_SQL
+            else:
+                placeholders = ", ".join(["?"] * len(chunk))
+                query = _q(_GET_EMPLOYEES_RATES_BY_IDS_SQL.format(placeholders=placeholders))
+            cursor.execute(query, chunk)
+            for row in iter_rows_as_dicts(cursor):
+                result[row["employee_id"]] = row
+        return result
+
+    # ============== Statistics ==============
+
+    @_cached_statistics
+    def get_statistics(self, period: Optional[str] = None) -> Dict:
+        """Get dashboard statistics"""
+        cursor = self.db.cursor()
 
-        # Period statistics
+        # Ignored companies come from the cached settings, not a query per call
+        ignored_companies = self.get_ignored_companies()
+        company_filter, company_params = _build_company_filter(ignored_companies)
+
+        # Period resolution (latest when not specified), basic counts, period
+        # statistics and profit distribution in one round trip
+        buckets, bucket_params = self._profit_bucket_columns()
         cursor.execute(
             _q(f"""
-            SELECT
-                AVG(gross_profit) as average_profit,
-                AVG(profit_margin) as average_margin,
-                SUM(billing_amount) as total_revenue,
-                SUM(total_company_cost) as total_cost,
-                SUM(gross_profit) as total_profit
-            FROM payroll_records p
-            LEFT JOIN employees e ON p.employee_id = e.employee_id
-            WHERE p.period = ?
-            {company_filter}
+            WITH target AS (
+                SELECT COALESCE(?, MAX(period)) as period FROM payroll_records
+            ),
+            emp_counts AS (
+                SELECT
+                    COUNT(*) as total_employees,
+                    COALESCE(SUM(CASE WHEN status = 'active' THEN 1 ELSE 0 END), 0) as active_employees
+                FROM employees
+            ),
+            company_counts AS (
+                -- Count companies (excluding ignored)
+                SELECT COUNT(DISTINCT e.dispatch_company) as total_companies
+                FROM employees e
+                WHERE 1=1 {company_filter}
+            ),
+            period_agg AS (
+                SELECT
+                    AVG(gross_profit) as average_profit,
+                    AVG(profit_margin) as average_margin,
+                    SUM(billing_amount) as total_revenue,
+                    SUM(total_company_cost) as total_cost,
+                    SUM(gross_profit) as total_profit,
+                    {buckets}
+                FROM payroll_records p
+                LEFT JOIN employees e ON p.employee_id = e.employee_id
+                WHERE p.period = (SELECT period FROM target)
+                {company_filter}
+            )
+            SELECT * FROM target, emp_counts, company_counts, period_agg
         """),
-            (period,) + company_params,
+            (period,) + company_params + bucket_params + company_params,
         )
         stats = cursor.fetchone()
+        period = stats["period"]
+        if not period:
+            return self._empty_statistics()
+
+        total_employees = stats["total_employees"]
+        active_employees = stats["active_employees"]
+        total_companies = stats["total_companies"]
 
         # Profit trend (last 6 periods) - Sort properly handling Japanese period format
         if USE_POSTGRES:
@@ -815,34 +1391,23 @@ class PayrollService:
                 {order_clause}
                 LIMIT 6
             """)
-        profit_trend = [dict(row) for row in cursor.fetchall()][
+        profit_trend = _rows_as_dicts(cursor)[
             ::-1
         ]  # Reverse for chronological order
 
-        # Profit distribution
-        profit_distribution = self._calculate_profit_distribution(period)
+        # Profit distribution (counted in the period aggregate above)
+        profit_distribution = self._profit_distribution_from_row(stats)
 
-        # Top companies
-        cursor.execute(
-            _q(f"""
-            SELECT
-                e.dispatch_company as company_name,
-                COUNT(DISTINCT e.employee_id) as employee_count,
-                AVG(e.hourly_rate) as average_hourly_rate,
-                AVG(e.billing_rate) as average_billing_rate,
-                AVG(e.billing_rate - e.hourly_rate) as average_profit,
-                AVG((e.billing_rate - e.hourly_rate) / NULLIF(e.billing_rate, 0) * 100) as average_margin,
-                SUM(p.gross_profit) as total_monthly_profit
-            FROM employees e
-            LEFT JOIN payroll_records p ON e.employee_id = p.employee_id AND p.period = ?
-            WHERE 1=1 {company_filter}
-            GROUP BY e.dispatch_company
-            ORDER BY total_monthly_profit DESC NULLS LAST
-            LIMIT 5
-        """),
-            (period,) + company_params,
-        )
-        top_companies = [dict(row) for row in cursor.fetchall()]
+        # Top companies, sliced from the shared per-company aggregate.
+        # Ignored companies are skipped (NULL companies too, like NOT IN in SQL)
+        top_companies = []
+        for row in self._get_company_rows(period):
+            name = row["company_name"]
+            if ignored_companies and (name is None or name in ignored_companies):
+                continue
+            top_companies.append({key: row[key] for key in self.TOP_COMPANY_FIELDS})
+            if len(top_companies) == 5:
+                break
 
         # Recent payrolls
         cursor.execute(
@@ -857,7 +1422,7 @@ class PayrollService:
         """),
             (period,) + company_params,
         )
-        recent_payrolls = [dict(row) for row in cursor.fetchall()]
+        recent_payrolls = _rows_as_dicts(cursor)
 
         return {
             "total_employees": total_employees,
@@ -875,55 +1440,38 @@ class PayrollService:
             "current_period": period,
         }
 
-    def _calculate_profit_distribution(self, period: str) -> List[Dict]:
-        """Calculate profit distribution for a period
+    # Profit margin ranges based on 製造派遣 target margin of 12%
+    PROFIT_RANGES = [
+        ("<7%", -999999999, 7),   # Critical
+        ("7-10%", 7, 10),         # Needs improvement
+        ("10-12%", 10, 12),       # Good - close to target
+        ("≥12%", 12, 999999999),  # Target achieved
+    ]
 
-        Ranges are based on 製造派遣 target margin of 12%:
-        - <7%: Critical (赤字リスク)
-        - 7-10%: Below target (要改善)
-        - 10-12%: Close to target (良好)
-        - ≥12%: Target achieved (目標達成)
+    def _profit_bucket_columns(self) -> tuple:
         """
-        cursor = self.db.cursor()
-
-        # Get ignored companies list (works with both SQLite and PostgreSQL)
-        ignored_companies = _get_ignored_companies(cursor)
-        company_filter, company_params = _build_company_filter(ignored_companies)
-
-        ranges = [
-            ("<7%", -999999999, 7),   # Critical
-            ("7-10%", 7, 10),         # Needs improvement
-            ("10-12%", 10, 12),       # Good - close to target
-            ("≥12%", 12, 999999999),  # Target achieved
-        ]
+        SELECT-list fragment counting rows per PROFIT_RANGES bucket in one scan.
 
-        cursor.execute(
-            _q(f"""
-            SELECT COUNT(*)
-            FROM payroll_records p
-            LEFT JOIN employees e ON p.employee_id = e.employee_id
-            WHERE p.period = ?
-            {company_filter}
-        """),
-            (period,) + company_params,
+        Returns (sql, params); columns are dist_total and dist_b0..dist_bN.
+        Expects payroll_records aliased as p.
+        """
+        buckets = ",\n                ".join(
+            ["COUNT(*) as dist_total"]
+            + [
+                f"SUM(CASE WHEN p.profit_margin >= ? AND p.profit_margin < ? THEN 1 ELSE 0 END) as dist_b{i}"
+                for i in range(len(self.PROFIT_RANGES))
+            ]
         )
-        total = _get_count(cursor.fetchone())
+        params = tuple(v for _, min_val, max_val in self.PROFIT_RANGES for v in (min_val, max_val))
+        return buckets, params
+
+    def _profit_distribution_from_row(self, row) -> List[Dict]:
+        """Turn the _profit_bucket_columns counts into the dashboard distribution list"""
+        total = (row["dist_total"] or 0) if row else 0
 
         distribution = []
-        for range_name, min_val, max_val in ranges:
-            cursor.execute(
-                _q(f"""
-                SELECT COUNT(*)
-                FROM payroll_records p
-                LEFT JOIN employees e ON p.employee_id = e.employee_id
-                WHERE p.period = ?
-                AND p.profit_margin >= ?
-                AND p.profit_margin < ?
-                {company_filter}
-            """),
-                (period, min_val, max_val) + company_params,
-            )
-            count = _get_count(cursor.fetchone())
+        for i, (range_name, _, _) in enumerate(self.PROFIT_RANGES):
+            count = (row[f"dist_b{i}"] or 0) if row else 0
             percentage = (count / total * 100) if total > 0 else 0
             distribution.append(
                 {
@@ -935,54 +1483,42 @@ class PayrollService:
 
         return distribution
 
+    # Dashboard payload for a database without payroll data (read-only; callers get copies)
+    _EMPTY_STATISTICS: Mapping[str, Any] = MappingProxyType({
+        "total_employees": 0,
+        "active_employees": 0,
+        "total_companies": 0,
+        "average_profit": 0,
+        "average_margin": 0,
+        "total_monthly_revenue": 0,
+        "total_monthly_cost": 0,
+        "total_monthly_profit": 0,
+        "profit_trend": [],
+        "profit_distribution": [],
+        "top_companies": [],
+        "recent_payrolls": [],
+        "current_period": None,
+    })
+
     def _empty_statistics(self) -> Dict:
-        """Return empty statistics"""
-        return {
-            "total_employees": 0,
-            "active_employees": 0,
-            "total_companies": 0,
-            "average_profit": 0,
-            "average_margin": 0,
-            "total_monthly_revenue": 0,
-            "total_monthly_cost": 0,
-            "total_monthly_profit": 0,
-            "profit_trend": [],
-            "profit_distribution": [],
-            "top_companies": [],
-            "recent_payrolls": [],
-            "current_period": None,
-        }
+        """Return empty statistics (a copy; the empty lists are shared and never mutated)"""
+        return dict(self._EMPTY_STATISTICS)
 
+    @_cached_statistics
     def get_monthly_statistics(
         self, year: Optional[int] = None, month: Optional[int] = None
     ) -> List[Dict]:
         """Get monthly statistics"""
         cursor = self.db.cursor()
 
-        query = """
-            SELECT
-                period,
-                COUNT(DISTINCT employee_id) as total_employees,
-                SUM(billing_amount) as total_revenue,
-                SUM(total_company_cost) as total_cost,
-                SUM(gross_profit) as total_profit,
-                AVG(profit_margin) as average_margin,
-                SUM(company_social_insurance) as total_social_insurance,
-                SUM(paid_leave_hours * (SELECT hourly_rate FROM employees WHERE employees.employee_id = payroll_records.employee_id)) as total_paid_leave_cost
-            FROM payroll_records
-        """
-
         params = []
         if year and month:
-            period = f"{year}年{month}月"
-            query += " WHERE period = ?"
-            params.append(period)
+            params.append(f"{year}年{month}月")
 
-        query += " GROUP BY period ORDER BY period DESC"
-
-        cursor.execute(query, params)
-        return [dict(row) for row in cursor.fetchall()]
+        cursor.execute(_MONTHLY_STATS_QUERIES[(bool(params),)], params)
+        return _rows_as_dicts(cursor)
 
+    @_cached_statistics
     def get_company_statistics(self, period: str = None) -> List[Dict]:
         """Get statistics by company, including additional costs"""
         cursor = self.db.cursor()
@@ -992,27 +1528,6 @@ class PayrollService:
             cursor.execute("SELECT MAX(period) FROM payroll_records")
             period = _get_first_col(cursor.fetchone())
 
-        cursor.execute(
-            _q("""
-            SELECT
-                e.dispatch_company as company_name,
-                COUNT(DISTINCT e.employee_id) as employee_count,
-                AVG(e.hourly_rate) as average_hourly_rate,
-                AVG(e.billing_rate) as average_billing_rate,
-                AVG(e.billing_rate - e.hourly_rate) as average_profit,
-                AVG((e.billing_rate - e.hourly_rate) / NULLIF(e.billing_rate, 0) * 100) as average_margin,
-                COALESCE(SUM(p.gross_profit), 0) as total_monthly_profit,
-                COALESCE(SUM(p.billing_amount), 0) as total_monthly_revenue
-            FROM employees e
-            LEFT JOIN payroll_records p ON e.employee_id = p.employee_id AND p.period = ?
-            GROUP BY e.dispatch_company
-            ORDER BY total_monthly_profit DESC
-        """),
-            (period,),
-        )
-
-        result = [dict(row) for row in cursor.fetchall()]
-
         # Fetch all additional costs for the period in ONE query (fix N+1 pattern)
         cursor.execute(
             _q("""
@@ -1027,32 +1542,74 @@ class PayrollService:
             row["dispatch_company"]: float(row["additional_costs"])
             for row in cursor.fetchall()
         }
+        ignored = frozenset(self.get_ignored_companies())
 
-        # Add additional costs and adjusted profit for each company (no more N+1)
-        for c in result:
+        # One pass over the cached aggregate: copy each row, then add
+        # additional costs, adjusted profit/margin and the 'is_active' flag
+        result = []
+        for row in self._get_company_rows(period):
+            c = dict(row)
             company_name = c["company_name"]
+            profit = c["total_monthly_profit"] = c["total_monthly_profit"] or 0
+            revenue = c["total_monthly_revenue"] = c["total_monthly_revenue"] or 0
             additional_costs = additional_costs_map.get(company_name, 0.0)
 
             c["additional_costs"] = additional_costs
-            c["adjusted_profit"] = float(c["total_monthly_profit"]) - additional_costs
-
-            # Calculate adjusted margin
-            revenue = float(c["total_monthly_revenue"] or 0)
-            if revenue > 0:
-                c["adjusted_margin"] = (c["adjusted_profit"] / revenue) * 100
-            else:
-                c["adjusted_margin"] = 0.0
-
-        # Add 'is_active' flag
-        ignored = self.get_ignored_companies()
-        for c in result:
-            c["is_active"] = c["company_name"] not in ignored
+            c["adjusted_profit"] = float(profit) - additional_costs
+            c["adjusted_margin"] = (
+                c["adjusted_profit"] / float(revenue) * 100 if revenue > 0 else 0.0
+            )
+            c["is_active"] = company_name not in ignored
+            result.append(c)
 
         # Re-sort by adjusted profit
         result.sort(key=lambda x: x["adjusted_profit"], reverse=True)
 
         return result
 
+    # Columns of get_statistics()["top_companies"] entries
+    TOP_COMPANY_FIELDS = (
+        "company_name",
+        "employee_count",
+        "average_hourly_rate",
+        "average_billing_rate",
+        "average_profit",
+        "average_margin",
+        "total_monthly_profit",
+    )
+
+    @_cached_statistics
+    def _get_company_rows(self, period: str) -> List[Dict]:
+        """
+        Per-company aggregate for a period, best monthly profit first.
+
+        Shared by get_statistics (top 5 active companies) and
+        get_company_statistics (all companies); callers copy rows before
+        adding fields since the list is cached. Companies without payroll in
+        the period have NULL totals and sort last.
+        """
+        cursor = self.db.cursor()
+        cursor.execute(
+            _q("""
+            SELECT
+                e.dispatch_company as company_name,
+                COUNT(DISTINCT e.employee_id) as employee_count,
+                AVG(e.hourly_rate) as average_hourly_rate,
+                AVG(e.billing_rate) as average_billing_rate,
+                AVG(e.billing_rate - e.hourly_rate) as average_profit,
+                AVG((e.billing_rate - e.hourly_rate) / NULLIF(e.billing_rate, 0) * 100) as average_margin,
+                SUM(p.gross_profit) as total_monthly_profit,
+                SUM(p.billing_amount) as total_monthly_revenue
+            FROM employees e
+            LEFT JOIN payroll_records p ON e.employee_id = p.employee_id AND p.period = ?
+            GROUP BY e.dispatch_company
+            ORDER BY total_monthly_profit DESC NULLS LAST
+        """),
+            (period,),
+        )
+        return _rows_as_dicts(cursor)
+
+    @_cached_statistics
     def get_profit_trend(self, months: int = 6) -> List[Dict]:
         """Get profit trend for last N months"""
         cursor = self.db.cursor()
@@ -1071,7 +1628,7 @@ class PayrollService:
         """,
             (months,),
         )
-        return [dict(row) for row in cursor.fetchall()][::-1]
+        return _rows_as_dicts(cursor)[::-1]
 
 
 class ExcelParser:
@@ -1126,38 +1683,123 @@ class ExcelParser:
         "売上": "billing_amount",
     }
 
+    # Header text -> (internal field, is_numeric), keys normalized once here
+    # so the per-file header pass is a single dict lookup per column
+    _HEADER_LOOKUP: Mapping[str, tuple] = MappingProxyType({
+        jp_col.strip(): (internal_col, internal_col not in _TEXT_COLUMNS)
+        for jp_col, internal_col in COLUMN_MAPPINGS.items()
+    })
+
     def parse(self, content: bytes, file_ext: str) -> List[PayrollRecordCreate]:
         """Parse file content and return list of PayrollRecordCreate objects"""
         if file_ext == ".csv":
             return self._parse_csv(content)
-        elif file_ext in [".xlsx", ".xlsm", ".xls"]:
+        elif file_ext in {".xlsx", ".xlsm", ".xls"}:
             return self._parse_excel(content)
         else:
             raise ValueError(f"Unsupported file type: {file_ext}")
 
+    async def parse_async(self, content: bytes, file_ext: str) -> List[PayrollRecordCreate]:
+        """parse() on a worker thread, so async endpoints don't block the event loop"""
+        return await asyncio.to_thread(self.parse, content, file_ext)
+
     def _parse_csv(self, content: bytes) -> List[PayrollRecordCreate]:
-        """Parse CSV content"""
-        records = []
+        """Parse CSV content, decoding it as a stream rather than a whole-file str"""
+        for encoding in self._sniff_csv_encodings(content):
+            stream = io.TextIOWrapper(io.BytesIO(content), encoding=encoding, newline="")
+            try:
+                if PANDAS_AVAILABLE:
+                    return self._parse_csv_frame(stream)
+                return list(self._iter_records(csv.reader(stream)))
+            except UnicodeDecodeError:
+                # The sample decoded but a later byte didn't; try the next candidate
+                continue
+
+        raise ValueError("Could not decode file with supported encodings")
 
-        # Try different encodings
+    @staticmethod
+    def _sniff_csv_encodings(content: bytes) -> List[str]:
+        """
+        Candidate encodings for a CSV upload, most likely first.
+
+        A BOM settles it outright; otherwise only the first 4KB is test-decoded
+        to rule out encodings instead of decoding the whole file per attempt.
+        """
+        if content.startswith(codecs.BOM_UTF8):
+            return ["utf-8-sig"]
+        if content.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return ["utf-16"]
+
+        sample = content[:4096]
+        candidates = []
         for encoding in ["utf-8", "shift_jis", "cp932"]:
             try:
-                text = content.decode(encoding)
-                break
+                # final=False tolerates a multibyte character cut at the sample edge
+                codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
             except UnicodeDecodeError:
                 continue
-        else:
-            raise ValueError("Could not decode file with supported encodings")
+            candidates.append(encoding)
+        return candidates
+
+    def _parse_csv_frame(self, stream) -> List[PayrollRecordCreate]:
+        """Parse a decoded CSV stream with pandas, converting whole columns at once"""
+        # The header row is resolved by position, as on the row-by-row path, so
+        # repeated headers are not renamed by pandas; when several headers map
+        # to one field the last one wins
+        header = next(csv.reader(stream), [])
+        columns = {}
+        for index, internal_col, is_numeric in self._build_header_map(header):
+            columns[internal_col] = (index, is_numeric)
+        if not columns:
+            return []
+
+        # Only the mapped columns are read; numeric text is converted per
+        # column below, where unparseable cells can fall back to 0
+        try:
+            df = pd.read_csv(
+                stream,
+                header=None,
+                names=list(range(len(header))),
+                dtype=str,
+                keep_default_na=False,
+                usecols=sorted({index for index, _ in columns.values()}),
+            )
+        except pd.errors.EmptyDataError:
+            # Header only: no records, as with csv.reader
+            return []
 
-        reader = csv.DictReader(io.StringIO(text))
+        df = df[[index for index, _ in columns.values()]]
+        df.columns = list(columns.keys())
 
-        for row in reader:
-            record = self._map_row_to_record(row)
+        for col, (_, is_numeric) in columns.items():
+            if not is_numeric:
+                df[col] = df[col].str.strip()
+            else:
+                df[col] = self._convert_numeric_column(df[col])
+
+        records = []
+        for mapped in df.to_dict("records"):
+            record = self._build_record(mapped)
             if record:
                 records.append(record)
 
         return records
 
+    @staticmethod
+    def _convert_numeric_column(series: "pd.Series") -> "pd.Series":
+        """
+        Convert a column of numeric cell text to floats; unparseable cells become 0.
+
+        Plain numbers go straight through to_numeric. Only the cells it could
+        not parse (currency symbols, thousands separators, full-width text)
+        go through _parse_numeric_str, same as the non-pandas path.
+        """
+        numeric = pd.to_numeric(series, errors="coerce")
+        needs_cleaning = numeric.isna() & (series != "")
+        if needs_cleaning.any():
+            numeric[needs_cleaning] = series[needs_cleaning].map(_parse_numeric_str)
+        return numeric.fillna(0).astype(float)
+
     def _parse_excel(self, content: bytes) -> List[PayrollRecordCreate]:
         """Parse Excel content"""
         try:
@@ -1165,36 +1807,60 @@ class ExcelParser:
 
             import openpyxl
 
-            wb = openpyxl.load_workbook(BytesIO(content), data_only=True)
-            ws = wb.active
-
-            # Get header row
-            headers = [cell.value for cell in ws[1]]
-            records = []
-
-            for row in ws.iter_rows(min_row=2, values_only=True):
-                row_dict = dict(zip(headers, row))
-                record = self._map_row_to_record(row_dict)
-                if record:
-                    records.append(record)
-
-            return records
+            # read_only streams rows from the sheet XML without building Cell objects;
+            # keep_links=False skips loading external workbook link caches
+            wb = openpyxl.load_workbook(
+                BytesIO(content), read_only=True, data_only=True, keep_links=False
+            )
+            try:
+                ws = wb.active
+                return list(self._iter_records(ws.iter_rows(values_only=True)))
+            finally:
+                wb.close()
 
         except ImportError:
             raise ValueError(
                 "openpyxl is required to parse Excel files. Install with: pip install openpyxl"
             )
 
-    def _map_row_to_record(self, row: dict) -> Optional[PayrollRecordCreate]:
-        """Map a row dictionary to PayrollRecordCreate"""
+    def _iter_records(self, rows: Iterator) -> Iterator[PayrollRecordCreate]:
+        """Yield records from a row iterator whose first row is the header"""
+        header_map = self._build_header_map(next(rows, ()))
+        for row in rows:
+            record = self._map_row_to_record(row, header_map)
+            if record:
+                yield record
+
+    def _build_header_map(self, headers) -> List[tuple]:
+        """
+        Resolve the header row once per file.
+
+        Returns (column index, internal field, is_numeric) for every header
+        found in COLUMN_MAPPINGS; unknown columns are dropped.
+        """
+        header_map = []
+        for index, jp_col in enumerate(headers):
+            if jp_col:
+                resolved = self._HEADER_LOOKUP.get(str(jp_col).strip())
+                if resolved:
+                    header_map.append((index, *resolved))
+        return header_map
+
+    def _map_row_to_record(
+        self, row_values: tuple, header_map: List[tuple]
+    ) -> Optional[PayrollRecordCreate]:
+        """Map a row of cell values to PayrollRecordCreate using a prebuilt header map"""
         mapped = {}
 
-        for jp_col, value in row.items():
-            if jp_col and value is not None:
-                internal_col = self.COLUMN_MAPPINGS.get(str(jp_col).strip())
-                if internal_col:
-                    mapped[internal_col] = self._convert_value(value, internal_col)
+        for index, internal_col, is_numeric in header_map:
+            value = row_values[index] if index < len(row_values) else None
+            if value is not None:
+                mapped[internal_col] = self._convert_value(value, is_numeric)
+
+        return self._build_record(mapped)
 
+    def _build_record(self, mapped: dict) -> Optional[PayrollRecordCreate]:
+        """Validate mapped fields and build PayrollRecordCreate"""
         # Validate required fields
         if not mapped.get("employee_id") or not mapped.get("period"):
             return None
@@ -1207,58 +1873,29 @@ class ExcelParser:
         ):
             return None
 
-        # Set defaults for missing fields
-        defaults = {
-            "work_days": 0,
-            "work_hours": 0,
-            "overtime_hours": 0,
-            "night_hours": 0,
-            "holiday_hours": 0,
-            "overtime_over_60h": 0,
-            "paid_leave_hours": 0,
-            "paid_leave_days": 0,
-            "paid_leave_amount": 0,
-            "base_salary": 0,
-            "overtime_pay": 0,
-            "night_pay": 0,
-            "holiday_pay": 0,
-            "overtime_over_60h_pay": 0,
-            "transport_allowance": 0,
-            "other_allowances": 0,
-            "gross_salary": 0,
-            "social_insurance": 0,
-            "employment_insurance": 0,
-            "income_tax": 0,
-            "resident_tax": 0,
-            "rent_deduction": 0,
-            "utilities_deduction": 0,
-            "meal_deduction": 0,
-            "advance_payment": 0,
-            "year_end_adjustment": 0,
-            "other_deductions": 0,
-            "net_salary": 0,
-            "billing_amount": 0,
-        }
-
-        for key, default_value in defaults.items():
-            if key not in mapped:
-                mapped[key] = default_value
-
+        # Fields absent from the file fall back to the model's own 0 defaults;
+        # only columns that were actually present are passed to validation
         return PayrollRecordCreate(**mapped)
 
-    def _convert_value(self, value: Any, field: str) -> Any:
+    def _convert_value(self, value: Any, is_numeric: bool) -> Any:
         """Convert value to appropriate type"""
         if value is None:
             return None
 
-        if field in ["employee_id", "period"]:
+        if not is_numeric:
             return str(value).strip()
 
-        # Numeric fields
+        # Exact type checks first: csv cells are plain str, xlsx cells plain
+        # int/float. Subclasses (bool, numpy scalars) take the isinstance path.
+        value_type = type(value)
+        if value_type is str:
+            return _parse_numeric_str(value)
+        # NaN counts as an empty cell
+        if value_type is float or value_type is int or isinstance(value, (int, float)):
+            return float(value) if value == value else 0.0
+        if isinstance(value, str):
+            return _parse_numeric_str(value)
         try:
-            if isinstance(value, str):
-                # Remove currency symbols and commas
-                value = value.replace("¥", "").replace(",", "").replace(" ", "").strip()
             return float(value)
         except (ValueError, TypeError):
             return 0
@@ -34,44 +34,35 @@ def sync_employees_from_master():
     conn = get_connection()
     service = PayrollService(conn)
 
-    created_count = 0
-    updated_count = 0
+    employee_rows = []
     errors = 0
 
     try:
         for emp in employees:
             try:
-                # Check if exists
-                existing = service.get_employee(emp.employee_id)
-
-                emp_data = EmployeeCreate(
-                    employee_id=emp.employee_id,
-                    name=emp.name,
-                    name_kana=emp.name_kana,
-                    dispatch_company=emp.dispatch_company,
-                    department=emp.department,
-                    hourly_rate=emp.hourly_rate,
-                    billing_rate=emp.billing_rate,
-                    status=emp.status,
-                    hire_date=emp.hire_date,
+                employee_rows.append(
+                    EmployeeCreate(
+                        employee_id=emp.employee_id,
+                        name=emp.name,
+                        name_kana=emp.name_kana,
+                        dispatch_company=emp.dispatch_company,
+                        department=emp.department,
+                        hourly_rate=emp.hourly_rate,
+                        billing_rate=emp.billing_rate,
+                        status=emp.status,
+                        hire_date=emp.hire_date,
+                    )
                 )
-
-                if existing:
-                    # Update
-                    service.update_employee(emp.employee_id, emp_data)
-                    updated_count += 1
-                else:
-                    # Create
-                    service.create_employee(emp_data)
-                    created_count += 1
-
             except Exception as e:
                 print(f"[ERROR] Failed to sync employee {emp.employee_id}: {e}")
                 errors += 1
 
+        # One batched upsert (and one commit) for the whole master file
+        result = service.bulk_upsert_employees(employee_rows)
+
         print("\nSync Completed!")
-        print(f"Created: {created_count}")
-        print(f"Updated: {updated_count}")
+        print(f"Created: {result['created']}")
+        print(f"Updated: {result['updated']}")
         print(f"Errors:  {errors}")
 
     finally:
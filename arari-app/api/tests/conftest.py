@@ -8,9 +8,10 @@ from fastapi.testclient import TestClient
 # Add the parent directory to the sys.path to allow imports from the api module
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from database import get_db, init_db
+from database import get_db, get_read_db, init_db
 from main import app
 from rate_limiter import reset_rate_limiter
+from services import invalidate_settings_cache, invalidate_statistics_cache
 
 
 @pytest.fixture(autouse=True)
@@ -24,6 +25,18 @@ def clear_rate_limits():
     reset_rate_limiter()
 
 
+@pytest.fixture(autouse=True)
+def clear_statistics_cache():
+    """
+    Drop cached dashboard statistics and settings so each test's fresh database is queried.
+    """
+    invalidate_statistics_cache()
+    invalidate_settings_cache()
+    yield
+    invalidate_statistics_cache()
+    invalidate_settings_cache()
+
+
 @pytest.fixture(scope="function")
 def db_session():
     """
@@ -37,6 +50,7 @@ def db_session():
         return conn
 
     app.dependency_overrides[get_db] = get_test_db
+    app.dependency_overrides[get_read_db] = get_test_db
 
     yield conn
 
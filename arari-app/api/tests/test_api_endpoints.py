@@ -5,6 +5,8 @@ Tests for critical API endpoints: employees, payroll, statistics
 import os
 import sys
 
+import pytest
+
 # Add api directory to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
@@ -165,6 +167,54 @@ def test_get_statistics_with_data(authenticated_client, db_session):
     assert "active_employees" in result or "total_employees" in result
 
 
+def test_read_endpoints_use_read_only_pool(
+    test_client, db_session, tmp_path, monkeypatch
+):
+    """Test GET endpoints run on the PRAGMA query_only pool, not the test connection"""
+    import sqlite3
+
+    import database
+    from database import ConnectionPool, get_connection, get_read_db, init_db
+    from main import app
+
+    db_path = tmp_path / "arari_pro.db"
+    conn = get_connection(db_path)
+    init_db(conn)
+    conn.execute(
+        "INSERT INTO employees (employee_id, name, dispatch_company) VALUES (?, ?, ?)",
+        ("RO001", "読取専用", "読取会社"),
+    )
+    conn.execute(
+        "INSERT INTO payroll_records (employee_id, period, gross_salary) VALUES (?, ?, ?)",
+        ("RO001", "2025年1月", 250000),
+    )
+    conn.commit()
+    conn.close()
+
+    pool = ConnectionPool(str(db_path), read_only=True)
+    monkeypatch.setattr(database, "_sqlite_read_pool", pool)
+    # Serve reads through the real dependency instead of the writable test connection
+    app.dependency_overrides.pop(get_read_db)
+
+    try:
+        response = test_client.get("/api/statistics")
+        assert response.status_code == 200
+        assert response.json()["total_employees"] == 1
+
+        response = test_client.get("/api/employees")
+        assert response.status_code == 200
+        assert [e["employee_id"] for e in response.json()] == ["RO001"]
+
+        # The requests above returned their connection to the pool, which rejects writes
+        assert not pool._idle.empty()
+        read_conn = pool.acquire()
+        with pytest.raises(sqlite3.OperationalError):
+            read_conn.execute("DELETE FROM employees")
+        pool.release(read_conn)
+    finally:
+        pool.close_all()
+
+
 # ================================================================
 # PAYROLL API TESTS
 # ================================================================
@@ -288,3 +338,152 @@ def test_search_employees(authenticated_client, db_session):
         assert len(result["results"]) >= 1
     else:
         assert isinstance(result, list)
+
+
+# ================================================================
+# EXPORT API TESTS
+# ================================================================
+
+
+def test_export_employees_streams_json_array(authenticated_client, db_session):
+    """Test GET /api/export/employees returns every employee as a JSON array"""
+    for i in range(3):
+        authenticated_client.post("/api/employees", json={
+            "employee_id": f"EXP00{i}",
+            "name": f"輸出{i}",
+            "dispatch_company": "輸出会社",
+            "hourly_rate": 1500,
+            "billing_rate": 1700,
+            "status": "active",
+        })
+
+    response = authenticated_client.get("/api/export/employees")
+    assert response.status_code == 200
+    result = response.json()
+    assert [e["employee_id"] for e in result] == ["EXP000", "EXP001", "EXP002"]
+    assert result[0]["profit_per_hour"] == 200
+
+    response = authenticated_client.get("/api/export/payroll")
+    assert response.status_code == 200
+    assert response.json() == []
+
+    response = authenticated_client.get("/api/export/all?format=excel")
+    assert response.status_code == 200
+    assert response.content[:2] == b"PK"
+
+
+def test_export_streams_while_another_request_runs(test_client, db_session, tmp_path):
+    """Streamed exports keep their connection until the body is sent"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from database import get_connection, get_db, init_db
+    from main import app
+
+    db_path = tmp_path / "export.db"
+    conn = get_connection(db_path)
+    init_db(conn)
+    conn.executemany(
+        "INSERT INTO employees (employee_id, name, dispatch_company) VALUES (?, ?, '輸出会社')",
+        [(f"EXP{i:04d}", f"輸出{i}") for i in range(500)],
+    )
+    conn.executemany(
+        "INSERT INTO payroll_records (employee_id, period) VALUES (?, '2025年1月')",
+        [(f"EXP{i:04d}",) for i in range(500)],
+    )
+    conn.commit()
+    conn.close()
+
+    def per_request_db():
+        # Like get_db on PostgreSQL: one connection per request, closed at teardown,
+        # so a body streamed after teardown would read from a closed connection
+        conn = get_connection(db_path)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    app.dependency_overrides[get_db] = per_request_db
+    paths = ["/api/export/employees", "/api/export/payroll"]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        responses = list(pool.map(test_client.get, paths))
+
+    assert [r.status_code for r in responses] == [200, 200]
+    assert [len(r.json()) for r in responses] == [500, 500]
+
+
+# ================================================================
+# BACKUP API TESTS
+# ================================================================
+
+
+@pytest.fixture
+def restore_headers(test_client, db_session, tmp_path, monkeypatch):
+    """Serve the app from a file database that backups are taken from and restored to"""
+    import backup
+    from database import get_connection, get_db, get_read_db, init_db
+    from main import app
+
+    db_path = tmp_path / "arari_pro.db"
+    conn = get_connection(db_path)
+    init_db(conn)
+    monkeypatch.setattr(backup, "DB_PATH", db_path)
+    monkeypatch.setattr(backup, "BACKUP_DIR", tmp_path / "backups")
+    app.dependency_overrides[get_db] = lambda: conn
+    app.dependency_overrides[get_read_db] = lambda: conn
+
+    login = test_client.post(
+        "/api/auth/login", json={"username": "admin", "password": "admin123"}
+    )
+    yield {"Authorization": f"Bearer {login.json()['token']}"}
+    conn.close()
+
+
+def _create_backup(test_client, headers):
+    response = test_client.post(
+        "/api/backups", json={"description": "before changes"}, headers=headers
+    )
+    assert response.status_code == 200
+    return response.json()["backup"]["filename"]
+
+
+def test_restore_backup_returns_restored_settings(test_client, restore_headers):
+    """Test POST /api/backups/{filename}/restore drops settings cached beforehand"""
+    headers = restore_headers
+    original = test_client.get("/api/settings/rates/insurance").json()
+    filename = _create_backup(test_client, headers)
+
+    test_client.put(
+        "/api/settings/employment_insurance_rate",
+        json={"value": "0.0200"},
+        headers=headers,
+    )
+    changed = test_client.get("/api/settings/rates/insurance").json()
+    assert changed["employment_insurance_rate"] == 0.02
+
+    response = test_client.post(f"/api/backups/{filename}/restore", headers=headers)
+    assert response.status_code == 200
+
+    assert test_client.get("/api/settings/rates/insurance").json() == original
+
+
+def test_restore_backup_returns_restored_statistics(test_client, restore_headers):
+    """Test POST /api/backups/{filename}/restore drops statistics cached beforehand"""
+    headers = restore_headers
+    filename = _create_backup(test_client, headers)
+
+    test_client.post(
+        "/api/employees",
+        json={"employee_id": "RST001", "name": "復元", "dispatch_company": "復元会社"},
+        headers=headers,
+    )
+    test_client.post(
+        "/api/payroll",
+        json={"employee_id": "RST001", "period": "2025年1月", "gross_salary": 250000},
+        headers=headers,
+    )
+    assert test_client.get("/api/statistics").json()["total_employees"] == 1
+
+    response = test_client.post(f"/api/backups/{filename}/restore", headers=headers)
+    assert response.status_code == 200
+
+    assert test_client.get("/api/statistics").json()["total_employees"] == 0
@@ -1,3 +1,4 @@
+import codecs
 import os
 import sys
 
@@ -7,7 +8,8 @@ import pytest
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from models import EmployeeCreate, PayrollRecordCreate
-from services import PayrollService
+import services
+from services import ExcelParser, PayrollService
 
 
 @pytest.fixture
@@ -136,3 +138,658 @@ def test_company_cost_calculation(payroll_service, test_employee):
     assert result["company_workers_comp"] == 750
     expected_total_cost = 250000 + 45000 + 2250 + 750
     assert result["total_company_cost"] == expected_total_cost
+
+
+# ================================================================
+# LIST QUERY TESTS
+# ================================================================
+
+
+def _ids(rows):
+    return [r["employee_id"] for r in rows]
+
+
+def test_get_employees_filter_combinations(payroll_service, test_employee, db_session):
+    """Each filter combination selects its precompiled statement"""
+    db_session.executemany(
+        "INSERT INTO employees (employee_id, name, dispatch_company, employee_type) VALUES (?, ?, ?, ?)",
+        [
+            ("U1", "Ukeoi One", "Test Co", "ukeoi"),
+            ("H2", "Haken Two", "Other Co", "haken"),
+        ],
+    )
+
+    assert _ids(payroll_service.get_employees()) == ["123456", "H2", "U1"]
+    assert _ids(payroll_service.get_employees(company="Test Co")) == ["123456", "U1"]
+    assert _ids(payroll_service.get_employees(search="Two", company="Other Co")) == [
+        "H2"
+    ]
+    assert _ids(
+        payroll_service.get_employees(company="Test Co", employee_type="ukeoi")
+    ) == ["U1"]
+    assert (
+        payroll_service.get_payroll_records(period="2099年1月", employee_id="U1") == []
+    )
+
+
+def test_bulk_upsert_employees(payroll_service, test_employee):
+    """Master sync creates new IDs, overwrites existing ones, and counts like a loop"""
+    result = payroll_service.bulk_upsert_employees(
+        [
+            EmployeeCreate(
+                employee_id="123456",
+                name="Renamed",
+                dispatch_company="New Co",
+                billing_rate=2100,
+            ),
+            EmployeeCreate(employee_id="M1", name="First", dispatch_company="New Co"),
+            EmployeeCreate(employee_id="M1", name="Second", dispatch_company="New Co"),
+        ]
+    )
+    assert result == {"created": 1, "updated": 2}
+
+    updated = payroll_service.get_employee("123456")
+    assert (updated["name"], updated["billing_rate"], updated["name_kana"]) == (
+        "Renamed",
+        2100,
+        None,
+    )
+    assert payroll_service.get_employee("M1")["name"] == "Second"
+    assert [
+        e["employee_id"] for e in payroll_service.get_employees(search="Second")
+    ] == ["M1"]
+
+
+def test_get_employees_search_uses_trigram_index(
+    payroll_service, test_employee, db_session
+):
+    """3+ character searches go through employees_fts and match the LIKE scan"""
+    db_session.executemany(
+        "INSERT INTO employees (employee_id, name, name_kana, dispatch_company) VALUES (?, ?, ?, ?)",
+        [
+            ("V100", "グエン ヴァン", "グエン", "A Co"),
+            ("V200", "山田 太郎", "ヤマダ タロウ", "B Co"),
+        ],
+    )
+    db_session.execute(
+        "UPDATE employees SET name = 'Nguyen Van' WHERE employee_id = 'V100'"
+    )
+
+    plan = db_session.execute(
+        "EXPLAIN QUERY PLAN " + services._EMPLOYEE_FTS_QUERIES[(True, False, False)],
+        ('"abc"', "%abc%", "%abc%", "%abc%"),
+    ).fetchall()
+    assert any("employees_fts" in row[3] for row in plan)
+
+    searches = ["nguyen", "ヤマダ", "山田 太", "V20", "Test", "ヴァン", "no match"]
+    indexed = [_ids(payroll_service.get_employees(search=q)) for q in searches]
+    assert indexed[:5] == [["V100"], ["V200"], ["V200"], ["V200"], ["123456"]]
+
+    db_session.execute("DROP TABLE employees_fts")
+    assert [_ids(payroll_service.get_employees(search=q)) for q in searches] == indexed
+
+
+def test_insurance_rates_from_settings(payroll_service, db_session):
+    """Both rates come from settings, with defaults when a key is missing"""
+    db_session.execute("DELETE FROM settings WHERE key = 'workers_comp_rate'")
+    payroll_service.update_setting("employment_insurance_rate", "0.0095")
+
+    assert payroll_service.get_insurance_rates() == {
+        "employment_insurance_rate": 0.0095,
+        "workers_comp_rate": 0.003,
+    }
+
+
+def test_settings_cached_until_update(payroll_service, db_session):
+    """Settings reads are served from cache; update_setting invalidates them"""
+    rates = payroll_service.get_insurance_rates()
+    assert payroll_service.get_setting("target_margin") is not None
+
+    db_session.execute("UPDATE settings SET value = '0.5'")
+    assert payroll_service.get_insurance_rates() == rates
+    assert payroll_service.get_setting("target_margin") != "0.5"
+
+    payroll_service.update_setting("workers_comp_rate", "0.004")
+    assert payroll_service.get_insurance_rates()["workers_comp_rate"] == 0.004
+    assert payroll_service.get_setting("target_margin") == "0.5"
+
+
+def test_ignored_companies_cached_until_changed(payroll_service):
+    """The decoded list is cached, handed out as a copy, and refreshed on change"""
+    assert payroll_service.get_ignored_companies() == []
+    payroll_service.get_ignored_companies().append("leaked")
+    assert payroll_service.get_ignored_companies() == []
+
+    payroll_service.set_company_active("Acme", False)
+    assert payroll_service.get_ignored_companies() == ["Acme"]
+    payroll_service.set_company_active("Acme", True)
+    assert payroll_service.get_ignored_companies() == []
+
+
+def _payroll_stat_rows(db_session):
+    """Row counts ANALYZE recorded for payroll_records"""
+    return {
+        row[0].split()[0]
+        for row in db_session.execute(
+            "SELECT stat FROM sqlite_stat1 WHERE tbl = 'payroll_records'"
+        )
+    }
+
+
+def test_bulk_import_refreshes_planner_statistics(
+    payroll_service, db_session, test_employee
+):
+    """The first import into an empty payroll table is followed by ANALYZE"""
+    payroll_service.analyze(force=True)
+    db_session.execute("DELETE FROM sqlite_stat1 WHERE tbl = 'payroll_records'")
+    payroll_service.bulk_create_payroll_records(
+        [
+            PayrollRecordCreate(
+                employee_id=test_employee["employee_id"], period="2025年1月"
+            )
+        ]
+    )
+    db_session.commit()
+
+    assert payroll_service.analyze()
+    assert _payroll_stat_rows(db_session) == {"1"}
+
+
+def test_chunked_import_refreshes_planner_statistics(payroll_service, db_session):
+    """Rows saved across many bulk calls add up towards the ANALYZE threshold"""
+    db_session.executemany(
+        "INSERT INTO employees (employee_id, name, dispatch_company) VALUES (?, ?, 'Test Co')",
+        [(f"E{i}", f"Worker {i}") for i in range(3000)],
+    )
+    db_session.executemany(
+        "INSERT INTO payroll_records (employee_id, period) VALUES (?, '2024年1月')",
+        [(f"E{i}",) for i in range(3000)],
+    )
+    db_session.commit()
+    assert payroll_service.analyze(force=True)
+
+    # Each 500-row chunk alone is far below 25% of the table
+    records = [
+        PayrollRecordCreate(employee_id=f"E{i}", period="2025年1月")
+        for i in range(1500)
+    ]
+    for start in range(0, len(records), 500):
+        payroll_service.bulk_create_payroll_records(records[start : start + 500])
+    db_session.commit()
+
+    assert payroll_service.analyze()
+    assert _payroll_stat_rows(db_session) == {"4500"}
+
+    # A small re-import into the now larger table does not re-run it
+    payroll_service.bulk_create_payroll_records(records[:10])
+    db_session.commit()
+    assert not payroll_service.analyze()
+
+
+def test_hot_payroll_queries_use_indexes(db_session):
+    """Period and employee lookups are index searches, not table scans"""
+    plans = {
+        "period": "SELECT p.* FROM payroll_records p WHERE p.period = ?",
+        "employee": "SELECT p.* FROM payroll_records p WHERE p.employee_id = ? AND p.period = ?",
+        "stats": "SELECT SUM(gross_profit) FROM payroll_records p WHERE p.period = ?",
+    }
+    for name, sql in plans.items():
+        params = ("x",) * sql.count("?")
+        detail = " ".join(
+            row[3] for row in db_session.execute("EXPLAIN QUERY PLAN " + sql, params)
+        )
+        assert "USING" in detail and "INDEX" in detail, (name, detail)
+
+    # Top payrolls by profit are read in index order, without a sort step
+    top = "SELECT p.* FROM payroll_records p WHERE p.period = ? ORDER BY p.gross_profit DESC LIMIT 10"
+    detail = " ".join(
+        row[3] for row in db_session.execute("EXPLAIN QUERY PLAN " + top, ("x",))
+    )
+    assert "idx_payroll_period_profit" in detail and "TEMP B-TREE" not in detail, detail
+
+    indexes = {
+        row[0]
+        for row in db_session.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'"
+        )
+    }
+    assert not indexes & {
+        "idx_payroll_period",
+        "idx_payroll_employee",
+        "idx_payroll_emp_period",
+    }
+
+
+def test_monthly_statistics_joins_employee_rate(db_session):
+    """The paid leave rate comes from a keyed join, not a correlated subquery"""
+    for sql in services._MONTHLY_STATS_QUERIES.values():
+        params = ("x",) * sql.count("?")
+        steps = [
+            row[3] for row in db_session.execute("EXPLAIN QUERY PLAN " + sql, params)
+        ]
+        assert not any("CORRELATED" in step for step in steps), steps
+        assert any(step.startswith("SEARCH e USING") for step in steps), steps
+
+
+# ================================================================
+# BULK INGESTION TESTS
+# ================================================================
+
+
+def test_bulk_create_matches_single_create(payroll_service, test_employee, db_session):
+    """Bulk ingestion stores the same derived fields as create_payroll_record"""
+    fields = dict(
+        employee_id=test_employee["employee_id"],
+        gross_salary=250000,
+        social_insurance=15000,
+        welfare_pension=30000,
+        work_hours=160,
+    )
+    single = payroll_service.create_payroll_record(
+        PayrollRecordCreate(period="2025年1月", **fields)
+    )
+
+    result = payroll_service.bulk_create_payroll_records(
+        [
+            PayrollRecordCreate(period="2025年2月", **fields),
+            PayrollRecordCreate(employee_id="UNKNOWN", period="2025年2月"),
+        ]
+    )
+    assert result == {"saved": 1, "errors": 1}
+
+    bulk = payroll_service.get_payroll_records(
+        period="2025年2月", employee_id=test_employee["employee_id"]
+    )[0]
+    for key in (
+        "billing_amount",
+        "total_company_cost",
+        "gross_profit",
+        "profit_margin",
+    ):
+        assert bulk[key] == single[key]
+
+    # The RETURNING row is shaped like a listed row
+    assert single["employee_name"] == "Test User"
+    assert single["dispatch_company"] == "Test Co"
+    assert set(single) == set(bulk)
+
+
+def test_bulk_create_keeps_rows_around_a_failed_one(payroll_service, db_session):
+    """A row the database rejects is counted as an error; the rest are still saved"""
+    db_session.executemany(
+        "INSERT INTO employees (employee_id, name, dispatch_company) VALUES (?, ?, 'Test Co')",
+        [(f"B{i}", f"Worker {i}") for i in range(3)],
+    )
+    db_session.execute("""
+        CREATE TRIGGER reject_b1 BEFORE INSERT ON payroll_records
+        WHEN NEW.employee_id = 'B1'
+        BEGIN SELECT RAISE(ABORT, 'rejected'); END
+    """)
+    db_session.commit()
+    records = [
+        PayrollRecordCreate(employee_id=f"B{i}", period="2025年3月") for i in range(3)
+    ]
+
+    assert payroll_service.bulk_create_payroll_records(records) == {
+        "saved": 2,
+        "errors": 1,
+    }
+    # The caller's transaction is still open: nothing was committed for it
+    db_session.rollback()
+    assert payroll_service.get_payroll_records(period="2025年3月") == []
+
+    payroll_service.bulk_create_payroll_records(records)
+    db_session.commit()
+    saved = payroll_service.get_payroll_records(period="2025年3月")
+    assert sorted(r["employee_id"] for r in saved) == ["B0", "B2"]
+
+
+def test_bulk_values_vectorized_matches_scalar(payroll_service):
+    """The numpy bulk calculation gives the same row values as the per-record path"""
+    import random
+
+    rng = random.Random(42)
+    rates = {"employment_insurance_rate": 0.009, "workers_comp_rate": 0.003}
+    pairs = []
+    for i in range(300):
+        base = rng.choice([0, rng.randint(100000, 300000)])
+        transport = rng.choice([0, 14002])
+        record = PayrollRecordCreate(
+            employee_id=f"V{i}",
+            period="2025年7月",
+            work_hours=rng.choice([0, 160.5, 168]),
+            overtime_hours=rng.choice([0, 12.25]),
+            night_hours=rng.choice([0, 8]),
+            base_salary=base,
+            transport_allowance=transport,
+            other_allowances=rng.choice([0, 5000]),
+            gross_salary=base + rng.choice([0, transport]),
+            social_insurance=rng.randint(0, 30000),
+            welfare_pension=rng.randint(0, 30000),
+            billing_amount=rng.choice([0, 0, 333333]),
+            company_employment_insurance=rng.choice([None, 1234]),
+            gross_profit=rng.choice([None, None, 50000]),
+            profit_margin=rng.choice([None, None, 9.9]),
+        )
+        employee = {"hourly_rate": 1500, "billing_rate": rng.choice([0, 1700, 1782.5])}
+        pairs.append((record, employee))
+
+    scalar = [payroll_service._build_payroll_values(r, e, rates) for r, e in pairs]
+    assert payroll_service._build_payroll_values_bulk(pairs, rates) == scalar
+
+
+def test_billing_amounts_vec_matches_scalar(payroll_service):
+    """Vectorized billing equals calculate_billing_amount per record"""
+    records = [
+        PayrollRecordCreate(
+            employee_id="B1",
+            period="2025年8月",
+            work_hours=160.5,
+            overtime_hours=12.25,
+            night_hours=8,
+            other_allowances=5000,
+        ),
+        PayrollRecordCreate(
+            employee_id="B2",
+            period="2025年8月",
+            work_hours=100,
+            overtime_over_60h=3,
+            holiday_hours=7.5,
+        ),
+        PayrollRecordCreate(employee_id="B3", period="2025年8月", work_hours=100),
+        # No hours worked: only the allowances are billed
+        PayrollRecordCreate(
+            employee_id="B4", period="2025年8月", other_allowances=3000.4
+        ),
+    ]
+    rates = [1782.5, 1700, 0, 1500]
+
+    expected = [
+        payroll_service.calculate_billing_amount(r, {"billing_rate": t})
+        for r, t in zip(records, rates)
+    ]
+    vec = payroll_service.calculate_billing_amounts_vec(records, rates).tolist()
+    assert vec == expected
+    assert expected[3] == 3000
+    assert all(type(amount) is int for amount in vec + expected)
+
+
+# ================================================================
+# STATISTICS TESTS
+# ================================================================
+
+
+def test_profit_distribution_buckets(payroll_service, test_employee, db_session):
+    """Margins are bucketed into the 12%-target ranges in one pass"""
+    db_session.executemany(
+        "INSERT INTO payroll_records (employee_id, period, profit_margin) VALUES (?, ?, ?)",
+        [(f"D{i}", "2025年3月", m) for i, m in enumerate([-5, 6.9, 7, 11.9, 12, 30])],
+    )
+    distribution = payroll_service.get_statistics("2025年3月")["profit_distribution"]
+    assert [(d["range"], d["count"]) for d in distribution] == [
+        ("<7%", 2),
+        ("7-10%", 1),
+        ("10-12%", 1),
+        ("≥12%", 2),
+    ]
+    assert distribution[0]["percentage"] == 33.3
+
+
+def test_statistics_counts_exclude_ignored_companies(
+    payroll_service, test_employee, db_session
+):
+    """Employee/company counts and period totals come from one combined query"""
+    db_session.executemany(
+        "INSERT INTO employees (employee_id, name, dispatch_company, status) VALUES (?, ?, ?, ?)",
+        [("E2", "B", "Other Co", "inactive"), ("E3", "C", "Hidden Co", "active")],
+    )
+    db_session.executemany(
+        "INSERT INTO payroll_records (employee_id, period, billing_amount, gross_profit) VALUES (?, ?, ?, ?)",
+        [("123456", "2025年5月", 3000, 300), ("E3", "2025年5月", 9000, 900)],
+    )
+    payroll_service.set_company_active("Hidden Co", False)
+
+    stats = payroll_service.get_statistics("2025年5月")
+    assert stats["total_employees"] == 3
+    assert stats["active_employees"] == 2
+    assert stats["total_companies"] == 2
+    assert stats["total_monthly_revenue"] == 3000
+    assert stats["total_monthly_profit"] == 300
+    assert [d["count"] for d in stats["profit_distribution"]] == [1, 0, 0, 0]
+
+    assert [c["company_name"] for c in stats["top_companies"]] == [
+        "Test Co",
+        "Other Co",
+    ]
+    companies = payroll_service.get_company_statistics("2025年5月")
+    assert [c["company_name"] for c in companies] == [
+        "Hidden Co",
+        "Test Co",
+        "Other Co",
+    ]
+    assert [c["is_active"] for c in companies] == [False, True, True]
+    assert companies[2]["total_monthly_profit"] == 0
+
+
+def test_company_filter_text_independent_of_list_length():
+    """The ignored list is one bound parameter, so the statement text is shared"""
+    one_sql, one_params = services._build_company_filter(["A"])
+    three_sql, three_params = services._build_company_filter(["A", "B", "工場C"])
+    assert one_sql == three_sql
+    assert len(one_params) == len(three_params) == 1
+
+
+def test_monthly_statistics_paid_leave_cost(payroll_service, test_employee, db_session):
+    """Paid leave cost uses the employee's hourly rate via the join"""
+    db_session.execute(
+        "INSERT INTO payroll_records (employee_id, period, paid_leave_hours, gross_profit) VALUES (?, ?, ?, ?)",
+        (test_employee["employee_id"], "2025年4月", 8, 1000),
+    )
+    db_session.execute(
+        "INSERT INTO payroll_records (employee_id, period, paid_leave_hours, gross_profit) VALUES (?, ?, ?, ?)",
+        ("NO_SUCH_EMP", "2025年4月", 8, 500),
+    )
+    stats = payroll_service.get_monthly_statistics(year=2025, month=4)
+    assert len(stats) == 1
+    assert stats[0]["total_employees"] == 2
+    assert stats[0]["total_profit"] == 1500
+    assert stats[0]["total_paid_leave_cost"] == 8 * 1500
+
+
+# ================================================================
+# FILE PARSING TESTS
+# ================================================================
+
+PAYROLL_CSV = (
+    "社員番号,対象期間,労働時間,基本給,交通費,請求金額\n"
+    '001,2025年1月,160,"¥240,000",abc,"272,000"\n'
+    "000000,2025年1月,8,1000,0,0\n"
+    ",2025年1月,8,1000,0,0\n"
+    "002,2025年1月,,150000,5000,170000\n"
+).encode("utf-8")
+
+
+def test_parse_csv_pandas_matches_row_parser(monkeypatch):
+    """The pandas CSV path produces the same records as the csv module path"""
+    fast = ExcelParser().parse(PAYROLL_CSV, ".csv")
+    monkeypatch.setattr(services, "PANDAS_AVAILABLE", False)
+    slow = ExcelParser().parse(PAYROLL_CSV, ".csv")
+
+    assert [r.model_dump() for r in fast] == [r.model_dump() for r in slow]
+    assert [r.employee_id for r in fast] == ["001", "002"]
+    assert fast[0].base_salary == 240000
+    assert fast[0].transport_allowance == 0
+    assert fast[1].work_hours == 0
+    # Columns missing from the file use the model defaults
+    assert fast[0].night_hours == 0
+    assert fast[0].net_salary == 0
+
+    # A repeated header keeps the last column's value on both paths
+    repeated = "社員番号,対象期間,基本給,基本給\n001,2025年1月,100000,200000\n".encode()
+    slow = ExcelParser().parse(repeated, ".csv")
+    monkeypatch.setattr(services, "PANDAS_AVAILABLE", True)
+    fast = ExcelParser().parse(repeated, ".csv")
+    assert [r.model_dump() for r in fast] == [r.model_dump() for r in slow]
+    assert fast[0].base_salary == 200000
+
+
+@pytest.mark.parametrize("use_pandas", [True, False])
+def test_parse_csv_encodings(monkeypatch, use_pandas):
+    """BOM-marked, Shift-JIS and UTF-16 uploads all map the first header column"""
+    monkeypatch.setattr(services, "PANDAS_AVAILABLE", use_pandas)
+    text = PAYROLL_CSV.decode("utf-8").replace("¥", "")
+
+    for content in (
+        codecs.BOM_UTF8 + text.encode("utf-8"),
+        text.encode("cp932"),
+        text.encode("utf-16"),
+    ):
+        records = ExcelParser().parse(content, ".csv")
+        assert [r.employee_id for r in records] == ["001", "002"]
+        assert records[0].base_salary == 240000
+
+
+@pytest.mark.parametrize("use_pandas", [True, False])
+def test_parse_csv_empty(monkeypatch, use_pandas):
+    """Empty and blank CSV uploads parse to no records instead of raising"""
+    monkeypatch.setattr(services, "PANDAS_AVAILABLE", use_pandas)
+    for content in (b"", b"\n\n", b"  \n \n"):
+        assert ExcelParser().parse(content, ".csv") == []
+
+
+def test_convert_value_numeric_cells():
+    """Numbers pass straight through; blank, NaN and junk cells become 0"""
+    parser = ExcelParser()
+    assert parser._convert_value(1500, True) == 1500.0
+    assert parser._convert_value(float("nan"), True) == 0
+    assert parser._convert_value("¥1,234 ", True) == 1234.0
+    assert parser._convert_value(" ", True) == 0
+    assert parser._convert_value("n/a", True) == 0
+    assert parser._convert_value(1001, False) == "1001"
+
+
+def test_convert_value_full_width_cells():
+    """Full-width digits and separators and other currency signs still parse"""
+    parser = ExcelParser()
+    assert parser._convert_value("１，２３４", True) == 1234.0
+    assert parser._convert_value("￥５００", True) == 500.0
+    assert parser._convert_value("$1,000", True) == 1000.0
+
+    import pandas as pd
+
+    assert ExcelParser._convert_numeric_column(
+        pd.Series(["１，２３４", "¥500", "", "12"])
+    ).tolist() == [1234.0, 500.0, 0.0, 12.0]
+
+
+def test_parse_excel_read_only():
+    """Excel uploads are read through the streaming (read-only) worksheet"""
+    from io import BytesIO
+
+    import openpyxl
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["社員番号", "対象期間", "基本給", "請求金額"])
+    ws.append(["001", "2025年1月", 240000, 272000])
+    ws.append([None, "2025年1月", 1000, 0])
+    output = BytesIO()
+    wb.save(output)
+
+    records = ExcelParser().parse(output.getvalue(), ".xlsx")
+    assert len(records) == 1
+    assert records[0].employee_id == "001"
+    assert records[0].billing_amount == 272000
+
+
+def test_statistics_cached_until_write(payroll_service, test_employee, db_session):
+    """Statistics are served from cache and refreshed once a payroll write is committed"""
+    payroll_service.create_payroll_record(
+        PayrollRecordCreate(
+            employee_id=test_employee["employee_id"], period="2025年6月", work_hours=100
+        )
+    )
+    first = payroll_service.get_statistics("2025年6月")
+
+    # Raw writes bypass invalidation, so the cached result is returned
+    db_session.execute("DELETE FROM payroll_records")
+    assert payroll_service.get_statistics("2025年6月") == first
+
+    payroll_service.create_payroll_record(
+        PayrollRecordCreate(
+            employee_id=test_employee["employee_id"], period="2025年6月", work_hours=200
+        )
+    )
+    # Uncommitted service writes leave the cache alone; the caller drops it after commit
+    assert payroll_service.get_statistics("2025年6月") == first
+    db_session.commit()
+    services.invalidate_statistics_cache()
+    assert payroll_service.get_statistics("2025年6月") != first
+
+
+def test_cached_statistics_are_copies_keyed_by_bound_arguments(
+    payroll_service, test_employee, db_session
+):
+    """Callers can change a cached result safely; positional and keyword calls share an entry"""
+    payroll_service.create_payroll_record(
+        PayrollRecordCreate(
+            employee_id=test_employee["employee_id"], period="2025年6月", work_hours=100
+        )
+    )
+    stats = payroll_service.get_statistics("2025年6月")
+    expected = {**stats, "top_companies": list(stats["top_companies"])}
+    companies = payroll_service.get_company_statistics("2025年6月")
+    assert stats["top_companies"] and companies
+
+    stats["top_companies"].clear()
+    stats["extra"] = True
+
+    # Raw writes bypass invalidation, so an equal result means a cache hit
+    db_session.execute("DELETE FROM payroll_records")
+    assert payroll_service.get_statistics(period="2025年6月") == expected
+    assert payroll_service.get_company_statistics(period="2025年6月") == companies
+
+
+def test_additional_cost_writes_refresh_company_statistics(
+    payroll_service, test_employee, db_session
+):
+    """Company statistics merge additional costs, so cost writes drop the cache"""
+    from additional_costs import AdditionalCostsService
+
+    costs = AdditionalCostsService(db_session)
+    assert (
+        payroll_service.get_company_statistics("2025年6月")[0]["additional_costs"]
+        == 0.0
+    )
+
+    cost = costs.create_cost("Test Co", "2025年6月", "transport_bus", 5000)
+    assert (
+        payroll_service.get_company_statistics("2025年6月")[0]["additional_costs"]
+        == 5000.0
+    )
+
+    costs.update_cost(cost["id"], amount=7000)
+    assert (
+        payroll_service.get_company_statistics("2025年6月")[0]["additional_costs"]
+        == 7000.0
+    )
+
+    costs.copy_costs_to_period("2025年6月", "2025年7月")
+    assert (
+        payroll_service.get_company_statistics("2025年7月")[0]["additional_costs"]
+        == 7000.0
+    )
+
+    costs.delete_cost(cost["id"])
+    assert (
+        payroll_service.get_company_statistics("2025年6月")[0]["additional_costs"]
+        == 0.0
+    )
+
+
+def test_parse_async_runs_parser():
+    """parse_async returns the same records as parse"""
+    import asyncio
+
+    records = asyncio.run(ExcelParser().parse_async(PAYROLL_CSV, ".csv"))
+    assert [r.employee_id for r in records] == ["001", "002"]
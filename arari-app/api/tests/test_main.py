@@ -1,3 +1,7 @@
+import sqlite3
+
+import pytest
+
 from fastapi.testclient import TestClient
 
 from main import app
@@ -11,3 +15,49 @@ def test_health_check():
     response = client.get("/api/health")
     assert response.status_code == 200
     assert response.json() == {"status": "healthy", "version": "2.0.0"}
+
+
+def test_connection_pool_reuses_and_resets(tmp_path):
+    """
+    Pooled connections are reused, and uncommitted work is rolled back on release.
+    """
+    from database import ConnectionPool
+
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=1)
+    conn = pool.acquire()
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.commit()
+    conn.execute("INSERT INTO t VALUES (1)")
+    pool.release(conn)
+
+    again = pool.acquire()
+    assert again is conn
+    assert again.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+    # Beyond max_size, extra connections are closed instead of pooled
+    extra = pool.acquire()
+    assert extra is not again
+    pool.release(again)
+    pool.release(extra)
+    assert pool.acquire() is again
+    pool.close_all()
+
+
+def test_read_only_pool_rejects_writes(tmp_path):
+    """
+    Connections from a read-only pool can query but not write.
+    """
+    from database import ConnectionPool
+
+    path = str(tmp_path / "pool.db")
+    writer = ConnectionPool(path).acquire()
+    writer.execute("CREATE TABLE t (x INTEGER)")
+    writer.execute("INSERT INTO t VALUES (1)")
+    writer.commit()
+
+    reader = ConnectionPool(path, read_only=True).acquire()
+    assert reader.execute("SELECT x FROM t").fetchone()[0] == 1
+    with pytest.raises(sqlite3.OperationalError):
+        reader.execute("INSERT INTO t VALUES (2)")
+    reader.close()
+    writer.close()
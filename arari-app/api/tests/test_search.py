@@ -0,0 +1,279 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# Add api directory to path so we can import modules from parent directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import search
+from database import init_db
+from search import SearchService
+
+
+@pytest.fixture
+def search_service(db_session):
+    """Fixture to create a SearchService with a seeded test database."""
+    cursor = db_session.cursor()
+    cursor.executemany(
+        """
+        INSERT INTO employees (employee_id, name, name_kana, dispatch_company, hourly_rate, billing_rate, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """,
+        [
+            ("S001", "田中 太郎", "タナカ タロウ", "ABC株式会社", 1200, 1800, "active"),
+            ("S002", "鈴木 花子", "スズキ ハナコ", "XYZ工業", 1350, 2100, "active"),
+            (
+                "S003",
+                "佐藤 次郎",
+                "サトウ ジロウ",
+                "ABC株式会社",
+                1150,
+                1650,
+                "inactive",
+            ),
+        ],
+    )
+    cursor.executemany(
+        """
+        INSERT INTO payroll_records (employee_id, period, work_hours, gross_salary, billing_amount, profit_margin)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """,
+        [
+            ("S001", "2025年1月", 160, 200000, 300000, -5.0),
+            ("S002", "2025年1月", 260, 0, 0, 45.0),
+            ("S003", "2025年1月", 160, 180000, 250000, 12.0),
+            ("S001", "2025年2月", 160, 200000, 300000, 15.0),
+        ],
+    )
+    db_session.commit()
+    return SearchService(db_session)
+
+
+# ================================================================
+# ANOMALY DETECTION TESTS
+# ================================================================
+
+
+def _assert_expected_anomalies(result):
+    anomalies = result["anomalies"]
+    assert anomalies["negative_margin"] == [
+        {
+            "employee_id": "S001",
+            "period": "2025年1月",
+            "margin": -5.0,
+            "name": "田中 太郎",
+        }
+    ]
+    assert [a["employee_id"] for a in anomalies["high_margin"]] == ["S002"]
+    assert anomalies["excessive_hours"][0]["hours"] == 260
+    assert anomalies["missing_billing"][0]["billing"] == 0
+    assert anomalies["zero_salary"][0]["salary"] == 0
+    assert result["total_count"] == 5
+
+
+def test_find_anomalies(search_service):
+    """All anomaly categories are detected in a single pass"""
+    result = search_service.find_anomalies("2025年1月")
+    _assert_expected_anomalies(result)
+
+
+def test_anomaly_flags_follow_payroll_writes(search_service, db_session):
+    """Trigger-maintained flags track UPDATE and INSERT OR REPLACE"""
+    db_session.execute(
+        "UPDATE payroll_records SET profit_margin = 10 WHERE employee_id = 'S001' AND period = '2025年1月'"
+    )
+    db_session.execute("""
+        INSERT OR REPLACE INTO payroll_records (employee_id, period, work_hours, gross_salary, billing_amount, profit_margin)
+        VALUES ('S003', '2025年1月', 300, 180000, 250000, 12.0)
+    """)
+    anomalies = search_service.find_anomalies("2025年1月")["anomalies"]
+    assert anomalies["negative_margin"] == []
+    assert sorted(a["employee_id"] for a in anomalies["excessive_hours"]) == [
+        "S002",
+        "S003",
+    ]
+
+    db_session.execute("DELETE FROM payroll_records WHERE employee_id = 'S002'")
+    result = search_service.find_anomalies()
+    assert result["total_count"] == 1
+
+
+def test_anomaly_flags_without_fts5(monkeypatch):
+    """Anomaly flags are created even when the FTS5 indexes cannot be"""
+
+    def no_fts5(cursor):
+        raise sqlite3.OperationalError("no such module: fts5")
+
+    monkeypatch.setattr(search, "_init_suggest_index", no_fts5)
+    conn = sqlite3.connect(":memory:")
+    init_db(conn)
+    conn.execute(
+        "INSERT INTO employees (employee_id, name, dispatch_company) VALUES ('S001', '田中 太郎', 'ABC株式会社')"
+    )
+    conn.execute(
+        "INSERT INTO payroll_records (employee_id, period, work_hours, profit_margin) "
+        "VALUES ('S001', '2025年1月', 260, -5.0)"
+    )
+
+    anomalies = SearchService(conn).find_anomalies("2025年1月")["anomalies"]
+    assert [a["employee_id"] for a in anomalies["negative_margin"]] == ["S001"]
+    assert [a["hours"] for a in anomalies["excessive_hours"]] == [260]
+    conn.close()
+
+
+# ================================================================
+# FILTER TESTS
+# ================================================================
+
+
+def test_search_employees_filters(search_service):
+    """Filter operators are applied via the dispatch table"""
+    result = search_service.search_employees(
+        filters=[
+            {"field": "dispatch_company", "operator": "eq", "value": "ABC株式会社"},
+            {
+                "field": "hourly_rate",
+                "operator": "between",
+                "value": 1000,
+                "value2": 1180,
+            },
+        ]
+    )
+    assert [r["employee_id"] for r in result["results"]] == ["S003"]
+
+    result = search_service.search_employees(
+        filters=[{"field": "employee_id", "operator": "in", "value": ["S001", "S002"]}]
+    )
+    assert result["total"] == 2
+
+
+def test_search_employees_ignores_unknown_operator(search_service):
+    """Unknown operators and invalid operands are skipped rather than erroring"""
+    result = search_service.search_employees(
+        filters=[
+            {"field": "name", "operator": "regex", "value": ".*"},
+            {"field": "hourly_rate", "operator": "between", "value": 1000},
+            {"field": "employee_id", "operator": "in", "value": "S001"},
+        ]
+    )
+    assert result["total"] == 3
+
+
+def test_search_employees_without_stats(search_service):
+    """include_stats=False swaps the aggregates for a has_records flag"""
+    result = search_service.search_employees(include_stats=False)
+    by_id = {r["employee_id"]: r for r in result["results"]}
+    assert by_id["S001"]["has_records"] == 1
+    assert "avg_margin" not in by_id["S001"]
+
+    # Sorting by margin still needs the aggregate
+    result = search_service.search_employees(
+        include_stats=False, sort_by="margin", sort_order="desc"
+    )
+    assert result["results"][0]["employee_id"] == "S002"
+    assert "avg_margin" in result["results"][0]
+
+
+# ================================================================
+# STREAMING TESTS
+# ================================================================
+
+
+def test_iter_employees_matches_eager_search(search_service):
+    """The streaming iterator yields the same page as search_employees"""
+    eager = search_service.search_employees(sort_by="name", page_size=2)
+    streamed = list(search_service.iter_employees(sort_by="name", page_size=2))
+    assert streamed == eager["results"]
+
+
+def test_stream_payroll_endpoint(test_client, search_service):
+    """GET /api/search/payroll/stream returns one JSON object per line"""
+    import json
+
+    response = test_client.get("/api/search/payroll/stream?q=2025年1月")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 3
+    assert all(r["period"] == "2025年1月" for r in rows)
+
+
+def test_search_large_in_filter_uses_temp_table(search_service):
+    """Large "in" lists are materialized and give the same result as a short list"""
+    ids = ["S001", "S003"] + [f"X{i:03d}" for i in range(100)]
+    result = search_service.search_employees(
+        filters=[{"field": "employee_id", "operator": "in", "value": ids}]
+    )
+    assert [r["employee_id"] for r in result["results"]] == ["S001", "S003"]
+
+    result = search_service.search_payroll(
+        filters=[{"field": "employee_id", "operator": "in", "value": ids}]
+    )
+    assert result["total"] == 3
+
+
+# ================================================================
+# SUGGESTION TESTS
+# ================================================================
+
+
+def test_search_suggestions_fts(search_service):
+    """3+ character queries are answered from the trigram index"""
+    assert search_service.get_search_suggestions("株式会社") == ["ABC株式会社"]
+    assert search_service.get_search_suggestions("abc", field="company") == [
+        "ABC株式会社"
+    ]
+    assert search_service.get_search_suggestions("S00", field="id") == [
+        "S001",
+        "S002",
+        "S003",
+    ]
+    assert search_service.get_search_suggestions("S00", field="employee") == []
+
+
+def test_search_suggestions_limit_counts_distinct_values(search_service, db_session):
+    """A company shared by many rows does not crowd out matching names"""
+    db_session.executemany(
+        "INSERT INTO employees (employee_id, name, dispatch_company) VALUES (?, ?, ?)",
+        [(f"C{i:03d}", f"Worker {i}", "Abcd Corp") for i in range(40)]
+        + [(f"P{i}", f"Abcd Person{i}", "Other Co") for i in range(5)],
+    )
+    expected = ["Abcd Corp"] + [f"Abcd Person{i}" for i in range(5)]
+
+    assert search_service.get_search_suggestions("Abcd") == expected
+    assert search_service._like_suggestions("Abcd", "all", 10) == expected
+
+
+def test_search_suggestions_skip_stale_index_rows(search_service, db_session):
+    """Stale index hits do not use up the limit on the FTS path"""
+    db_session.executemany(
+        "INSERT INTO employees (employee_id, name, dispatch_company) VALUES (?, ?, ?)",
+        [(f"P{i}", f"Abcd Person{i}", "Other Co") for i in range(6)],
+    )
+    # Rename without the sync trigger, leaving the old name in suggest_fts
+    db_session.execute("DROP TRIGGER trg_employees_suggest_update")
+    db_session.execute("UPDATE employees SET name = 'Zed' WHERE employee_id = 'P0'")
+    expected = [f"Abcd Person{i}" for i in range(1, 6)]
+
+    assert search_service.get_search_suggestions("Abcd", "employee", 5) == expected
+    assert search_service._like_suggestions("Abcd", "employee", 5) == expected
+
+
+def test_search_suggestions_short_query(search_service):
+    """2 character queries fall back to LIKE"""
+    assert search_service.get_search_suggestions("田中") == ["田中 太郎"]
+
+
+def test_search_suggestions_follow_employee_updates(search_service, db_session):
+    """Triggers keep the suggestion index in sync with employees"""
+    db_session.execute(
+        "UPDATE employees SET name = '山田 優子' WHERE employee_id = 'S001'"
+    )
+    db_session.execute("DELETE FROM employees WHERE employee_id = 'S002'")
+    assert search_service.get_search_suggestions("田中 太", field="employee") == []
+    assert search_service.get_search_suggestions("山田 優", field="employee") == [
+        "山田 優子"
+    ]
+    assert search_service.get_search_suggestions("XYZ", field="company") == []
@@ -8,6 +8,8 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Any, Dict, List
 
+from services import invalidate_statistics_cache
+
 
 class ValidationSeverity(Enum):
     ERROR = "error"  # Must be fixed
@@ -449,5 +451,6 @@ class ValidationService:
             )
             fixed += self.cursor.rowcount
             self.conn.commit()
+            invalidate_statistics_cache()
 
         return {"fixed": fixed, "failed": failed, "message": f"Fixed {fixed} records"}